@@ -2,32 +2,127 @@
 
 import asyncio
 from datetime import datetime, timedelta
+from functools import partial
 import json
 import logging
 
-import aiohttp
 import voluptuous as vol
 
-from homeassistant.components import mqtt
+from homeassistant.components import persistent_notification
 
 # MQTT integration
-from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_PORT, CONF_USERNAME
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers import config_validation as cv, discovery
-from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_USERNAME,
+    EVENT_HOMEASSISTANT_STOP,
+)
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, discovery, dispatcher
 from homeassistant.helpers.event import async_track_time_interval
 
+from .automat_table import AutomatTable
+from .bridge import BridgeClient
+from .consumption import PelletConsumption
+from .estimator import HeatingEstimator
+from .histogram import GapHistogram
+from .profiler import PROFILE_FILE, profiled, start_session, stop_session, write_report
+from .registry import BY_CODE, BY_NAME, PARAMS, spec_for_code
+from .sequencer import CommandSequencer
+from .tracing import (
+    FLUSH_INTERVAL,
+    TRACE_FILE,
+    CommandTracer,
+    async_flush_traces,
+    trace_mark,
+    trace_start,
+)
+from .transport import (
+    MQTT_MODE_DIRECT,
+    MQTT_MODE_SHARED,
+    DirectMqttTransport,
+    SharedMqttTransport,
+    aiomqtt_client_factory,
+)
+from .websocket_api import TelemetryHub, async_register_websocket_commands
+
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "kotel_mqtt"
 CONF_POLLING_INTERVAL = "polling_interval"
 CONF_MQTT_TOPIC_PREFIX = "mqtt_topic_prefix"
 CONF_BLUETOOTH_TIMEOUT = "bluetooth_timeout"
+CONF_AUGER_CAPACITY = "auger_capacity"
+CONF_WRITE_CONFIRM_TIMEOUT = "write_confirm_timeout"
+CONF_AUTO_RECONNECT = "auto_reconnect"
+CONF_ADAPTIVE_BLUETOOTH_TIMEOUT = "adaptive_bluetooth_timeout"
+CONF_MQTT_MODE = "mqtt_mode"
+CONF_MQTT_QOS = "mqtt_qos"
+CONF_MQTT_CLIENT_ID = "mqtt_client_id"
+CONF_PROFILES = "profiles"
+CONF_AUTOMAT_TABLE = "automat_table"
+CONF_AUTOMAT_POINTS = "points"
+CONF_TRACING = "tracing"
+CONF_SAMPLE_RATE = "sample_rate"
+CONF_MAX_BYTES = "max_bytes"
+CONF_BACKUP_COUNT = "backup_count"
 
 DEFAULT_PORT = 1883
 DEFAULT_POLLING_INTERVAL = 10
 DEFAULT_MQTT_TOPIC_PREFIX = "kotel"
 DEFAULT_BLUETOOTH_TIMEOUT = 10  # seconds
+DEFAULT_AUGER_CAPACITY = 12.0  # kg/h при непрерывной работе шнека
+DEFAULT_WRITE_CONFIRM_TIMEOUT = 5  # seconds
+DEFAULT_AUTO_RECONNECT = True
+BRIDGE_PROBE_INTERVAL = 60  # seconds
+# Пакетное чтение таблицы автомата: ответы идут по Bluetooth последовательно,
+# поэтому время ожидания растёт с числом кодов
+AUTOMAT_READ_TIMEOUT = 5  # seconds
+AUTOMAT_READ_TIMEOUT_PER_CODE = 0.5  # seconds
+DEFAULT_ADAPTIVE_BLUETOOTH_TIMEOUT = True
+
+# Adaptive Bluetooth timeout: порог = перцентиль интервалов × запас,
+# но не меньше bluetooth_timeout из конфигурации
+GAP_PERCENTILE = 0.99
+GAP_SAFETY_FACTOR = 1.5
+GAP_MIN_SAMPLES = 50
+MAX_ADAPTIVE_BLUETOOTH_TIMEOUT = 120  # seconds
+
+DEFAULT_MQTT_MODE = MQTT_MODE_SHARED
+DEFAULT_MQTT_QOS = 0
+DEFAULT_MQTT_CLIENT_ID = "kotel_mqtt_ha"
+
+def profile_param(value):
+    """Validate a profile key and return the parameter code."""
+    value = cv.string(value)
+    spec = BY_NAME.get(value) or spec_for_code(value)
+    # Записывать можно только параметры, не переменные
+    if spec is None or not spec.writable:
+        raise vol.Invalid(f"Unknown writable parameter: {value}")
+    return spec.code
+
+PARAM_CODE = vol.All(cv.string, vol.Match(r"^[0-9A-Fa-f]{4}$"))
+
+AUTOMAT_TABLE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_AUTOMAT_POINTS): cv.positive_int,
+        vol.Required("fuel_supply_base"): PARAM_CODE,
+        vol.Required("pause_duration_base"): PARAM_CODE,
+        vol.Required("fan_speed_base"): PARAM_CODE,
+    }
+)
+
+TRACING_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_SAMPLE_RATE, default=1.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=1)
+        ),
+        vol.Optional(CONF_MAX_BYTES, default=1048576): cv.positive_int,
+        vol.Optional(CONF_BACKUP_COUNT, default=3): cv.positive_int,
+    }
+)
 
 CONFIG_SCHEMA = vol.Schema(
     {
@@ -46,28 +141,44 @@ CONFIG_SCHEMA = vol.Schema(
                 vol.Optional(
                     CONF_BLUETOOTH_TIMEOUT, default=DEFAULT_BLUETOOTH_TIMEOUT
                 ): cv.positive_int,
+                vol.Optional(
+                    CONF_AUGER_CAPACITY, default=DEFAULT_AUGER_CAPACITY
+                ): cv.positive_float,
+                vol.Optional(
+                    CONF_WRITE_CONFIRM_TIMEOUT, default=DEFAULT_WRITE_CONFIRM_TIMEOUT
+                ): cv.positive_int,
+                vol.Optional(
+                    CONF_AUTO_RECONNECT, default=DEFAULT_AUTO_RECONNECT
+                ): cv.boolean,
+                vol.Optional(
+                    CONF_ADAPTIVE_BLUETOOTH_TIMEOUT,
+                    default=DEFAULT_ADAPTIVE_BLUETOOTH_TIMEOUT,
+                ): cv.boolean,
+                vol.Optional(CONF_MQTT_MODE, default=DEFAULT_MQTT_MODE): vol.In(
+                    [MQTT_MODE_SHARED, MQTT_MODE_DIRECT]
+                ),
+                vol.Optional(CONF_MQTT_QOS, default=DEFAULT_MQTT_QOS): vol.All(
+                    vol.Coerce(int), vol.In([0, 1, 2])
+                ),
+                vol.Optional(
+                    CONF_MQTT_CLIENT_ID, default=DEFAULT_MQTT_CLIENT_ID
+                ): cv.string,
+                vol.Optional(CONF_PROFILES, default={}): {
+                    cv.string: {profile_param: cv.positive_int}
+                },
+                vol.Optional(CONF_AUTOMAT_TABLE): AUTOMAT_TABLE_SCHEMA,
+                vol.Optional(CONF_TRACING): TRACING_SCHEMA,
             }
         )
     },
     extra=vol.ALLOW_EXTRA,
 )
 
-# Полное соответствие параметров из клиента
-PARAM_MAPPING = {
-    # Основные параметры
-    "0001": "fuel_supply",  # Подача топлива (сек)
-    "0002": "pause_duration",  # Пауза (сек)
-    "0003": "fan_speed",  # Скорость вентилятора (%)
-    "0004": "thermostat",  # Термостат (°C)
-    "0007": "ignition",  # Розжиг (0/1)
-    "0015": "stabilization_temperature",  # Температура стабилизации (°C)
-    "001D": "operation_mode",  # Режим работы (0-стоп, 1-ручной, 2-авто)
-
-    # Переменные (данные в реальном времени)
-    "04": "temperature",  # Температура носителя (°C×10)
-    "09": "flame_level",  # Уровень пламени (ADC)
-    "11": "automat_point",  # Номер точки автомата
-}
+# Код параметра -> имя, из реестра параметров
+PARAM_MAPPING = {spec.code: spec.name for spec in PARAMS}
+
+# Рассылка сигналов сущностям; при профилировании замеряется вместе с обработчиками
+async_dispatcher_send = profiled(dispatcher.async_dispatcher_send, "dispatcher")
 
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up the Kotel MQTT component."""
@@ -79,25 +190,16 @@ async def async_setup(hass: HomeAssistant, config: dict):
         _LOGGER.error("Configuration for Kotel MQTT not found")
         return False
 
+    transport = create_transport(hass, conf)
+    if transport is None:
+        return False
+
     # Initialize data storage
-    hass.data[DOMAIN] = {
-        "host": conf[CONF_HOST],
-        "port": conf[CONF_PORT],
-        "username": conf.get(CONF_USERNAME),
-        "password": conf.get(CONF_PASSWORD),
-        "polling_interval": conf[CONF_POLLING_INTERVAL],
-        "topic_prefix": conf[CONF_MQTT_TOPIC_PREFIX],
-        "bluetooth_timeout": conf[CONF_BLUETOOTH_TIMEOUT],
-        "data": {},
-        "connected": False,
-        "bluetooth_connected": False,
-        "last_kotel_message": None,  # Timestamp of last message from kotel
-        "subscriptions": [],
-        "monitor_task": None
-    }
+    hass.data[DOMAIN] = create_runtime_data(hass, conf, transport)
 
     # Setup services
     await setup_services(hass)
+    async_register_websocket_commands(hass)
 
     # Setup MQTT subscription
     await setup_mqtt(hass)
@@ -114,6 +216,92 @@ async def async_setup(hass: HomeAssistant, config: dict):
     _LOGGER.info("Kotel MQTT integration setup complete")
     return True
 
+def create_runtime_data(hass: HomeAssistant, conf: dict, transport) -> dict:
+    """Create the runtime state stored in hass.data[DOMAIN]."""
+    return {
+        "host": conf[CONF_HOST],
+        "port": conf[CONF_PORT],
+        "username": conf.get(CONF_USERNAME),
+        "password": conf.get(CONF_PASSWORD),
+        "polling_interval": conf[CONF_POLLING_INTERVAL],
+        "topic_prefix": conf[CONF_MQTT_TOPIC_PREFIX],
+        "bluetooth_timeout": conf[CONF_BLUETOOTH_TIMEOUT],
+        "adaptive_bluetooth_timeout": conf[CONF_ADAPTIVE_BLUETOOTH_TIMEOUT],
+        "effective_bluetooth_timeout": conf[CONF_BLUETOOTH_TIMEOUT],
+        "gap_histogram": GapHistogram(),
+        "message_gap_percentile": None,  # Перцентиль GAP_PERCENTILE, по которому считается порог
+        "write_confirm_timeout": conf[CONF_WRITE_CONFIRM_TIMEOUT],
+        "auto_reconnect": conf[CONF_AUTO_RECONNECT],
+        "profiles": conf[CONF_PROFILES],
+        "data": {},
+        "connected": False,
+        "bluetooth_connected": False,
+        "last_kotel_message": None,  # Timestamp of last message from kotel
+        "subscriptions": [],
+        "pending_writes": {},  # Optimistic writes awaiting read-back by code
+        "sequencer": CommandSequencer(),
+        "monitor_task": None,
+        "consumption": PelletConsumption(conf[CONF_AUGER_CAPACITY]),
+        "estimator": HeatingEstimator(),
+        "bridge": BridgeClient(hass, conf[CONF_HOST]),
+        "transport": transport,
+        "telemetry": TelemetryHub(hass),
+        "automat_table": create_automat_table(conf.get(CONF_AUTOMAT_TABLE)),
+        "automat_read_lock": asyncio.Lock(),
+        "tracer": create_tracer(hass, conf.get(CONF_TRACING)),
+    }
+
+def create_transport(hass: HomeAssistant, conf: dict):
+    """Create the MQTT transport selected in the configuration."""
+    if conf[CONF_MQTT_MODE] == MQTT_MODE_DIRECT:
+        _LOGGER.info("Using dedicated MQTT connection to %s:%s",
+                     conf[CONF_HOST], conf[CONF_PORT])
+        try:
+            client_factory = aiomqtt_client_factory(
+                conf[CONF_HOST],
+                conf[CONF_PORT],
+                conf.get(CONF_USERNAME),
+                conf.get(CONF_PASSWORD),
+                conf[CONF_MQTT_CLIENT_ID],
+            )
+        except ImportError:
+            _LOGGER.error("mqtt_mode: direct requires the aiomqtt package (pip install aiomqtt)")
+            return None
+        return DirectMqttTransport(hass, conf[CONF_MQTT_QOS], client_factory)
+
+    return SharedMqttTransport(hass, conf[CONF_MQTT_QOS])
+
+def create_automat_table(table_conf: dict | None):
+    """Create the automat table cache if its codes are configured."""
+    if table_conf is None:
+        return None
+
+    return AutomatTable(
+        table_conf[CONF_AUTOMAT_POINTS],
+        {
+            field: table_conf[f"{field}_base"]
+            for field in ("fuel_supply", "pause_duration", "fan_speed")
+        },
+    )
+
+def create_tracer(hass: HomeAssistant, tracing_conf: dict | None):
+    """Create the command tracer and schedule trace file flushes if enabled."""
+    if tracing_conf is None:
+        return None
+
+    tracer = CommandTracer(
+        hass.config.path(TRACE_FILE),
+        tracing_conf[CONF_SAMPLE_RATE],
+        tracing_conf[CONF_MAX_BYTES],
+        tracing_conf[CONF_BACKUP_COUNT],
+    )
+    async_track_time_interval(
+        hass, partial(async_flush_traces, hass), timedelta(seconds=FLUSH_INTERVAL)
+    )
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, partial(async_flush_traces, hass))
+    _LOGGER.info("Command tracing enabled, sample rate %s", tracing_conf[CONF_SAMPLE_RATE])
+    return tracer
+
 async def load_platforms(hass: HomeAssistant, config: dict):
     """Load sensor and switch platforms."""
     # Load sensor platform
@@ -147,12 +335,15 @@ async def setup_mqtt(hass: HomeAssistant):
     """Set up MQTT subscription for Kotel data."""
     config = hass.data[DOMAIN]
     topic_prefix = config["topic_prefix"]
+    transport = config["transport"]
 
     data_topic = f"{topic_prefix}/data"
 
+    await transport.async_start()
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, transport.async_stop)
+
     # Subscribe to data topic
-    subscription = await mqtt.async_subscribe(
-        hass,
+    subscription = await transport.async_subscribe(
         data_topic,
         lambda msg: async_handle_mqtt_message(hass, msg)
     )
@@ -163,6 +354,7 @@ async def setup_mqtt(hass: HomeAssistant):
 
     _LOGGER.info("Subscribed to MQTT topic: %s", data_topic)
 
+@profiled
 def async_handle_mqtt_message(hass: HomeAssistant, msg):
     """Handle incoming MQTT messages."""
     try:
@@ -172,7 +364,11 @@ def async_handle_mqtt_message(hass: HomeAssistant, msg):
         _LOGGER.debug("Received MQTT message: %s", data)
 
         # Update last message timestamp for Bluetooth monitoring
-        config["last_kotel_message"] = datetime.now()
+        now = datetime.now()
+        last_message = config["last_kotel_message"]
+        if last_message is not None and config["bluetooth_connected"]:
+            record_message_gap(hass, (now - last_message).total_seconds())
+        config["last_kotel_message"] = now
 
         # Handle status messages
         if data.get("type") == "status":
@@ -181,6 +377,13 @@ def async_handle_mqtt_message(hass: HomeAssistant, msg):
             bluetooth_connected = data.get("bluetooth_connected", False)
 
             config["connected"] = status == "connected"
+            if bluetooth_connected and not config["bluetooth_connected"]:
+                # Мост сам восстановил связь: следующий обрыв начинает отсчёт заново
+                hass.loop.call_soon_threadsafe(config["bridge"].reset_backoff)
+                if config["automat_table"] is not None:
+                    hass.loop.call_soon_threadsafe(
+                        hass.async_create_task, refresh_automat_table(hass)
+                    )
             config["bluetooth_connected"] = bluetooth_connected
 
             _LOGGER.info("Kotel status: %s - %s (Bluetooth: %s)",
@@ -198,18 +401,245 @@ def async_handle_mqtt_message(hass: HomeAssistant, msg):
 
             if param_code and value is not None:
                 param_name = PARAM_MAPPING.get(param_code)
-                if param_name:
+                if param_name and not accept_reply(hass, param_code, value, data.get("seq")):
+                    _LOGGER.debug("Dropping stale reply for %s sent before the latest write", param_name)
+                elif param_name and not confirm_pending_write(hass, param_code, value):
+                    _LOGGER.debug("Keeping optimistic %s until read-back confirms it", param_name)
+                elif param_name:
+                    # Полный поток показаний идёт в websocket мимо машины состояний
+                    config["telemetry"].publish(param_name, BY_CODE[param_code].decode(value))
+                    trace_mark(hass, param_name, "reply")
                     config["data"][param_name] = value
                     hass.loop.call_soon_threadsafe(
                         async_dispatcher_send, hass, f"{DOMAIN}_update", param_name
                     )
                     _LOGGER.debug("Parameter %s updated to %s", param_name, value)
+                    update_consumption(hass)
+                    update_estimator(hass, param_name)
+                elif config["automat_table"] is not None and config["automat_table"].handles(param_code):
+                    if config["automat_table"].store(param_code, value):
+                        hass.loop.call_soon_threadsafe(config["automat_table"].finish_read)
+                        hass.loop.call_soon_threadsafe(
+                            async_dispatcher_send, hass, f"{DOMAIN}_update", "automat_table"
+                        )
                 else:
                     _LOGGER.debug("Unknown parameter code: %s", param_code)
 
     except Exception as e:  # noqa: BLE001
         _LOGGER.error("Error processing MQTT message: %s", e)
 
+def record_message_gap(hass: HomeAssistant, gap: float):
+    """Feed an inter-message gap into the adaptive Bluetooth timeout."""
+    config = hass.data[DOMAIN]
+    if not config["adaptive_bluetooth_timeout"]:
+        return
+
+    histogram = config["gap_histogram"]
+    histogram.add(gap)
+    if histogram.samples < GAP_MIN_SAMPLES:
+        return
+
+    gap_percentile = histogram.percentile(GAP_PERCENTILE)
+    # Потолок ограничивает только адаптивную часть: настроенный bluetooth_timeout не снижается
+    threshold = round(
+        max(config["bluetooth_timeout"],
+            min(gap_percentile * GAP_SAFETY_FACTOR, MAX_ADAPTIVE_BLUETOOTH_TIMEOUT)), 1
+    )
+    gap_percentile = round(gap_percentile, 1)
+    if (threshold, gap_percentile) != (config["effective_bluetooth_timeout"],
+                                       config["message_gap_percentile"]):
+        if threshold != config["effective_bluetooth_timeout"]:
+            _LOGGER.debug("Bluetooth timeout threshold adjusted to %.1f seconds", threshold)
+        config["effective_bluetooth_timeout"] = threshold
+        config["message_gap_percentile"] = gap_percentile
+        hass.loop.call_soon_threadsafe(
+            async_dispatcher_send, hass, f"{DOMAIN}_status_update"
+        )
+
+def update_consumption(hass: HomeAssistant):
+    """Integrate pellet consumption up to now and publish derived values."""
+    config = hass.data[DOMAIN]
+    consumption = config["consumption"]
+    table = config["automat_table"]
+    automat_settings = None
+    if table is not None:
+        # В авто-режиме подача задаётся текущей точкой автомата
+        automat_settings = table.point(config["data"].get("automat_point"))
+    consumption.update(config["data"], automat_settings)
+
+    for name, value in consumption.as_data().items():
+        if config["data"].get(name) != value:
+            config["data"][name] = value
+            hass.loop.call_soon_threadsafe(
+                async_dispatcher_send, hass, f"{DOMAIN}_update", name
+            )
+
+def accept_reply(hass: HomeAssistant, param_code: str, value, seq) -> bool:
+    """Return False if a reply is stale, unless it carries the value being written."""
+    config = hass.data[DOMAIN]
+    if config["sequencer"].accept(param_code, seq):
+        return True
+
+    # Значение ожидающей записи - это и есть подтверждение, откуда бы ни пришёл ответ
+    pending = config["pending_writes"].get(param_code)
+    return pending is not None and pending["value"] == value
+
+def confirm_pending_write(hass: HomeAssistant, param_code: str, value) -> bool:
+    """Match a reply against a pending write; return False to keep the optimistic value."""
+    pending = hass.data[DOMAIN]["pending_writes"].get(param_code)
+    if pending is None:
+        return True
+
+    if value == pending["value"]:
+        hass.loop.call_soon_threadsafe(_resolve_future, pending["confirmed"])
+        return True
+
+    # Ответ может быть на опрос, отправленный до записи: запоминаем его
+    # для отката, но оптимистичное значение пока не трогаем
+    pending["reported"] = value
+    return False
+
+def _resolve_future(future: asyncio.Future):
+    """Resolve a confirmation future unless it is already settled."""
+    if not future.done():
+        future.set_result(True)
+
+async def async_write_param(hass: HomeAssistant, param: str, value: int) -> bool:
+    """Write a parameter optimistically and verify it with a targeted read-back."""
+    if param not in PARAM_MAPPING:
+        return await send_mqtt_command(hass, "set_param", param, value)
+
+    results = await async_write_params(hass, {param: value})
+    return results[param]
+
+async def async_write_params(hass: HomeAssistant, values: dict) -> dict:
+    """Write several parameters as one batch and verify them with read-backs.
+
+    All set_param commands are published first, in the given order, then a
+    read-back for each code, and confirmations are awaited together.
+    Returns a mapping of parameter code to whether the write was confirmed.
+    """
+    config = hass.data[DOMAIN]
+    pendings = {}
+    results = {}
+
+    # Недопустимые значения отбрасываются до публикации и не тратят эфир Bluetooth
+    for param, value in values.items():
+        error = BY_CODE[param].validate(value)
+        if error:
+            _LOGGER.error("Rejected write: %s", error)
+            results[param] = False
+    values = {param: value for param, value in values.items() if param not in results}
+
+    for param, value in values.items():
+        param_name = PARAM_MAPPING[param]
+        trace_start(hass, param_name, "service")
+        superseded = config["pending_writes"].get(param)
+        pending = {
+            "value": value,
+            # При наложении записей откатываемся к последнему подтверждённому значению
+            "previous": superseded["previous"] if superseded else config["data"].get(param_name),
+            "reported": None,
+            "confirmed": hass.loop.create_future(),
+        }
+        config["pending_writes"][param] = pending
+        pendings[param] = pending
+
+        # Apply optimistically so entities reflect the change immediately
+        config["data"][param_name] = value
+        async_dispatcher_send(hass, f"{DOMAIN}_update", param_name)
+
+    for param, pending in pendings.items():
+        if not await send_mqtt_command(hass, "set_param", param, pending["value"]):
+            rollback_write(hass, param, pending, "команда не отправлена")
+            results[param] = False
+
+    awaiting = {param: pending for param, pending in pendings.items() if param not in results}
+    for param in awaiting:
+        await send_mqtt_command(hass, "get_param", param)
+
+    if awaiting:
+        await asyncio.wait(
+            [pending["confirmed"] for pending in awaiting.values()],
+            timeout=config["write_confirm_timeout"],
+        )
+
+    for param, pending in awaiting.items():
+        current = config["pending_writes"].get(param) is pending
+        if pending["confirmed"].done():
+            if current:
+                del config["pending_writes"][param]
+            _LOGGER.debug("Write %s=%s confirmed", param, pending["value"])
+            results[param] = True
+            continue
+
+        if current:
+            reason = (
+                f"котёл сообщил {pending['reported']}"
+                if pending["reported"] is not None
+                else "нет ответа от котла"
+            )
+            rollback_write(hass, param, pending, reason)
+        results[param] = False
+
+    return results
+
+def rollback_write(hass: HomeAssistant, param: str, pending: dict, reason: str):
+    """Revert an unconfirmed optimistic write and notify the user."""
+    config = hass.data[DOMAIN]
+    config["pending_writes"].pop(param, None)
+    param_name = PARAM_MAPPING[param]
+
+    restored = pending["reported"] if pending["reported"] is not None else pending["previous"]
+    if restored is None:
+        # Значение до записи не было известно: возвращаемся к «неизвестно», а не к None в кэше
+        config["data"].pop(param_name, None)
+        current = "неизвестно, котёл ещё не ответил на опрос"
+    else:
+        config["data"][param_name] = restored
+        current = restored
+    async_dispatcher_send(hass, f"{DOMAIN}_update", param_name)
+
+    _LOGGER.warning("Write %s=%s not confirmed (%s), rolled back to %s",
+                    param, pending["value"], reason, restored)
+    persistent_notification.async_create(
+        hass,
+        f"Параметр {param_name} ({param}) не изменён на {pending['value']}: {reason}. "
+        f"Текущее значение: {current}.",
+        title="Котёл: изменение не подтверждено",
+        notification_id=f"{DOMAIN}_write_{param}",
+    )
+
+def update_estimator(hass: HomeAssistant, param_name: str):
+    """Update the heating fit and publish heating rate and time to target."""
+    config = hass.data[DOMAIN]
+    data = config["data"]
+    estimator = config["estimator"]
+
+    estimator.observe_regime(data.get("operation_mode"), data.get("automat_point"))
+    temperature = BY_NAME["temperature"].decode(data.get("temperature"))
+    if temperature is not None:
+        if param_name == "temperature":
+            estimator.add(temperature)
+
+    # Уставка: термостат в ручном режиме, температура стабилизации в авто
+    target = {
+        1: data.get("thermostat"),
+        2: data.get("stabilization_temperature"),
+    }.get(data.get("operation_mode"))
+    time_to_target = estimator.time_to_target(temperature, target)
+
+    derived = {
+        "heating_rate": round(estimator.rate, 2) if estimator.rate is not None else None,
+        "time_to_target": round(time_to_target, 1) if time_to_target is not None else None,
+    }
+    for name, value in derived.items():
+        if data.get(name) != value:
+            data[name] = value
+            hass.loop.call_soon_threadsafe(
+                async_dispatcher_send, hass, f"{DOMAIN}_update", name
+            )
+
 async def setup_services(hass: HomeAssistant):
     """Set up services for Kotel MQTT."""
 
@@ -220,7 +650,10 @@ async def setup_services(hass: HomeAssistant):
         value = call.data.get("value", 0)
 
         _LOGGER.info("Sending MQTT command: %s %s=%s", cmd_type, param, value)
-        result = await send_mqtt_command(hass, cmd_type, param, value)
+        if cmd_type == "set_param":
+            result = await async_write_param(hass, param, value)
+        else:
+            result = await send_mqtt_command(hass, cmd_type, param, value)
 
         if result:
             _LOGGER.info("MQTT command sent successfully")
@@ -243,25 +676,87 @@ async def setup_services(hass: HomeAssistant):
         value = call.data.get("value")
         delta = call.data.get("delta")
 
+        spec = BY_CODE.get(param)
+        if spec is None or not spec.writable:
+            _LOGGER.error("Unknown writable parameter: %s", param)
+            return
+
         if delta is not None:
             # Change parameter by delta
-            current_value = hass.data[DOMAIN]['data'].get(PARAM_MAPPING.get(param, ''), 0)
-            new_value = current_value + delta
-
-            # Apply limits like in the web client
-            if param == '0003':  # Fan speed
-                new_value = max(0, min(25, new_value))
-            elif param in ['0015', '0004']:  # Temperatures
-                new_value = max(10, min(90, new_value))
-            else:
-                new_value = max(0, new_value)
+            current_value = hass.data[DOMAIN]['data'].get(spec.name)
+            if current_value is None:
+                _LOGGER.error("Cannot change %s by %s: current value is unknown", param, delta)
+                return
+            new_value = spec.clamp(current_value + delta)
 
             _LOGGER.info("Changing parameter %s by %s: %s -> %s", param, delta, current_value, new_value)
-            await send_mqtt_command(hass, "set_param", param, new_value)
+            await async_write_param(hass, param, new_value)
         elif value is not None:
             # Set parameter to specific value
             _LOGGER.info("Setting parameter %s to %s", param, value)
-            await send_mqtt_command(hass, "set_param", param, value)
+            await async_write_param(hass, param, value)
+
+    async def apply_profile_service(call: ServiceCall):
+        """Service to apply a named parameter profile in one batch."""
+        name = call.data["profile"]
+        profile = hass.data[DOMAIN]["profiles"][name]
+        data = hass.data[DOMAIN]["data"]
+
+        # Режим работы переключаем последним, после его параметров
+        ordered = sorted(profile.items(), key=lambda item: item[0] == "001D")
+        changed = {
+            param: value for param, value in ordered
+            if data.get(PARAM_MAPPING[param]) != value
+        }
+        unchanged = [param for param in profile if param not in changed]
+
+        _LOGGER.info("Applying profile %s: %s changed, %s unchanged",
+                     name, len(changed), len(unchanged))
+        results = await async_write_params(hass, changed) if changed else {}
+
+        report = {
+            "profile": name,
+            "applied": [param for param, ok in results.items() if ok],
+            "failed": [param for param, ok in results.items() if not ok],
+            "unchanged": unchanged,
+        }
+        hass.bus.async_fire(f"{DOMAIN}_profile_applied", report)
+        if report["failed"]:
+            _LOGGER.warning("Profile %s applied partially, failed: %s", name, report["failed"])
+        return report
+
+    async def read_automat_table_service(call: ServiceCall):
+        """Service to read the automat point table, served from cache when valid."""
+        table = hass.data[DOMAIN]["automat_table"]
+        if table.valid and not call.data["force"]:
+            return table.as_dict()
+
+        await read_automat_table(hass)
+        return table.as_dict()
+
+    async def profile_service(call: ServiceCall):
+        """Service to time the integration's loop callbacks for a while."""
+        session = start_session()
+        if session is None:
+            raise HomeAssistantError("Profiling is already running")
+
+        duration = call.data["duration"]
+        _LOGGER.info("Profiling Kotel MQTT callbacks for %s s", duration)
+        session.start_lag_sampling(hass.loop)
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            stop_session()
+
+        report = session.summary()
+        path = hass.config.path(PROFILE_FILE.format(datetime.now().strftime("%Y%m%d_%H%M%S")))
+        try:
+            await hass.async_add_executor_job(write_report, path, session.folded())
+            report["report"] = path
+        except OSError as e:
+            _LOGGER.error("Error writing profile report: %s", e)
+        _LOGGER.info("Profile finished: %s", report)
+        return report
 
     # Register services
     hass.services.async_register(
@@ -271,7 +766,7 @@ async def setup_services(hass: HomeAssistant):
         schema=vol.Schema(
             {
                 vol.Required("cmd_type"): vol.In(["set_param", "get_param", "get_var"]),
-                vol.Required("param"): cv.string,
+                vol.Required("param"): vol.All(cv.string, vol.Upper),
                 vol.Optional("value", default=0): cv.positive_int,
             }
         ),
@@ -295,25 +790,65 @@ async def setup_services(hass: HomeAssistant):
         change_parameter_service,
         schema=vol.Schema(
             {
-                vol.Required("param"): cv.string,
+                vol.Required("param"): vol.All(cv.string, vol.Upper),
                 vol.Optional("value"): cv.positive_int,
                 vol.Optional("delta"): int,
             }
         ),
     )
 
+    hass.services.async_register(
+        DOMAIN,
+        "apply_profile",
+        apply_profile_service,
+        schema=vol.Schema(
+            {
+                vol.Required("profile"): vol.In(list(hass.data[DOMAIN]["profiles"])),
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    if hass.data[DOMAIN]["automat_table"] is not None:
+        hass.services.async_register(
+            DOMAIN,
+            "read_automat_table",
+            read_automat_table_service,
+            schema=vol.Schema(
+                {
+                    vol.Optional("force", default=False): cv.boolean,
+                }
+            ),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        "profile",
+        profile_service,
+        schema=vol.Schema(
+            {
+                vol.Optional("duration", default=30): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=3600)
+                ),
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
     _LOGGER.info("Kotel MQTT services registered")
 
 async def start_bluetooth_monitoring(hass: HomeAssistant):
     """Start monitoring Bluetooth connection status."""
     config = hass.data[DOMAIN]
+    bridge = config["bridge"]
 
     async def monitor_bluetooth_connection(_):
         """Monitor Bluetooth connection and detect timeouts."""
         if config["last_kotel_message"]:
             time_since_last_message = (datetime.now() - config["last_kotel_message"]).total_seconds()
 
-            if time_since_last_message > config["bluetooth_timeout"]:
+            if time_since_last_message > config["effective_bluetooth_timeout"]:
                 # Bluetooth timeout detected
                 if config["bluetooth_connected"]:
                     _LOGGER.warning("Bluetooth timeout detected - no messages for %.1f seconds",
@@ -322,17 +857,33 @@ async def start_bluetooth_monitoring(hass: HomeAssistant):
                     hass.loop.call_soon_threadsafe(
                         async_dispatcher_send, hass, f"{DOMAIN}_status_update"
                     )
+
+                if config["auto_reconnect"] and bridge.reconnect_due():
+                    delay = bridge.schedule_next_attempt()
+                    _LOGGER.info("Automatic Bluetooth reconnect, next attempt in %.0f seconds", delay)
+                    hass.async_create_task(bridge.async_reconnect())
             elif not config["bluetooth_connected"] and config["connected"]:
                 config["bluetooth_connected"] = True
+                bridge.reset_backoff()
                 _LOGGER.info("Bluetooth connection restored")
                 hass.loop.call_soon_threadsafe(
                     async_dispatcher_send, hass, f"{DOMAIN}_status_update"
                 )
 
+    async def probe_bridge(_):
+        """Poll the bridge health endpoint."""
+        available = bridge.available
+        if await bridge.async_probe() != available:
+            async_dispatcher_send(hass, f"{DOMAIN}_status_update")
+
     # Start monitoring
     config["monitor_task"] = async_track_time_interval(
         hass, monitor_bluetooth_connection, timedelta(seconds=1)
     )
+    config["probe_task"] = async_track_time_interval(
+        hass, probe_bridge, timedelta(seconds=BRIDGE_PROBE_INTERVAL)
+    )
+    hass.async_create_task(probe_bridge(None))
 
 async def start_polling(hass: HomeAssistant):
     """Start polling for data at regular intervals."""
@@ -343,6 +894,9 @@ async def start_polling(hass: HomeAssistant):
         if config["connected"]:
             _LOGGER.debug("Polling for data update via MQTT")
             await request_initial_data(hass)
+            if config["automat_table"] is not None and not config["automat_table"].valid:
+                # Таблица сброшена записью или не прочитана: перечитываем в фоне
+                hass.async_create_task(refresh_automat_table(hass))
         else:
             _LOGGER.debug("Not connected, requesting status")
             await request_kotel_status(hass)
@@ -366,8 +920,7 @@ async def request_kotel_status(hass: HomeAssistant):
     }
 
     try:
-        await mqtt.async_publish(
-            hass,
+        await config["transport"].async_publish(
             config["status_topic"],
             json.dumps(payload)
         )
@@ -377,60 +930,82 @@ async def request_kotel_status(hass: HomeAssistant):
 
 async def reconnect_bluetooth(hass: HomeAssistant):
     """Send Bluetooth reconnect command to kotel_mqtt.py."""
+    return await hass.data[DOMAIN]["bridge"].async_reconnect()
+
+async def read_automat_table(hass: HomeAssistant) -> bool:
+    """Read the whole automat table with back-to-back requests and await all replies."""
     config = hass.data[DOMAIN]
-    base_url = f"http://{config['host']}:9999"  # kotel_mqtt.py runs on port 9999
+    table = config["automat_table"]
+    lock = config["automat_read_lock"]
 
-    try:
-        _LOGGER.info("Sending Bluetooth reconnect request to %s/reconnect", base_url)
-        async with aiohttp.ClientSession() as session:  # noqa: SIM117
-            async with session.get(f"{base_url}/reconnect") as response:
-                if response.status == 200:
-                    _LOGGER.info("Bluetooth reconnect request sent successfully")
-                    return True
-                _LOGGER.error("Bluetooth reconnect failed with status: %s", response.status)
-                return False
+    if lock.locked():
+        # Чтение уже идёт: дожидаемся его вместо повторного запроса всей таблицы
+        async with lock:
+            return table.valid
 
-    except Exception as e:  # noqa: BLE001
-        _LOGGER.error("Error sending Bluetooth reconnect request: %s", e)
-        return False
+    async with lock:
+        complete = table.begin_read(hass.loop)
+
+        _LOGGER.info("Reading automat table: %s parameters", len(table.codes))
+        for param in table.codes:
+            await send_mqtt_command(hass, "get_param", param)
+
+        try:
+            await asyncio.wait_for(
+                complete, AUTOMAT_READ_TIMEOUT + len(table.codes) * AUTOMAT_READ_TIMEOUT_PER_CODE
+            )
+        except TimeoutError:
+            _LOGGER.warning("Automat table read timed out, cached table kept")
+            table.finish_read()
+            return False
+
+        _LOGGER.info("Automat table read, version %s", table.version)
+        return True
+
+async def refresh_automat_table(hass: HomeAssistant):
+    """Read the automat table if it is stale and no read is running."""
+    config = hass.data[DOMAIN]
+    table = config["automat_table"]
+    if table is None or table.valid or config["automat_read_lock"].locked():
+        return
+    if not config["bluetooth_connected"]:
+        return
+    await read_automat_table(hass)
 
 async def request_initial_data(hass: HomeAssistant):
     """Request initial data parameters from kotel."""
 
     # Request all important parameters like in web client
-    params_to_request = [
-        # Parameters
-        ("get_param", "0001"),  # Fuel supply
-        ("get_param", "0002"),  # Pause duration
-        ("get_param", "0003"),  # Fan speed
-        ("get_param", "0004"),  # Thermostat
-        ("get_param", "0007"),  # Ignition
-        ("get_param", "0015"),  # Stabilization temp
-        ("get_param", "001D"),  # Operation mode
-
-        # Variables
-        ("get_var", "04"),      # Temperature
-        ("get_var", "09"),      # Flame level
-        ("get_var", "11"),      # Automat point
-    ]
-
-    for cmd_type, param in params_to_request:
-        await send_mqtt_command(hass, cmd_type, param)
+    for spec in PARAMS:
+        await send_mqtt_command(hass, spec.read_command, spec.code)
 
 async def send_mqtt_command(hass: HomeAssistant, cmd_type: str, param: str, value: int = 0):
     """Send a command to kotel via MQTT."""
     config = hass.data[DOMAIN]
     control_topic = f"{config['topic_prefix']}/control"
 
+    spec = BY_CODE.get(param)
+    if spec is not None:
+        if cmd_type == "set_param" and (error := spec.validate(value)):
+            _LOGGER.error("Rejected MQTT command: %s", error)
+            return False
+        trace_mark(hass, spec.name, f"publish {cmd_type}")
+
+    table = config["automat_table"]
+    if cmd_type == "set_param" and table is not None and table.handles(param):
+        _LOGGER.debug("Automat table invalidated by write to %s", param)
+        table.invalidate()
+
     payload = {
         "cmd_type": cmd_type,
         "param": param,
-        "value": value
+        "value": value,
+        # Номер команды; если мост вернёт его в ответе, устаревшие ответы отсекаются точно
+        "seq": config["sequencer"].sent(cmd_type, param),
     }
 
     try:
-        await mqtt.async_publish(
-            hass,
+        await config["transport"].async_publish(
             control_topic,
             json.dumps(payload)
         )
@@ -0,0 +1,107 @@
+"""Cache of the automat curve point table for Kotel MQTT."""
+import asyncio
+import json
+import zlib
+
+# Настройки каждой точки автомата, код параметра = база + номер точки
+AUTOMAT_FIELDS = ("fuel_supply", "pause_duration", "fan_speed")
+
+
+class AutomatTable:
+    """Per-point automat settings, read in bulk and kept until a related write."""
+
+    def __init__(self, points: int, bases: dict) -> None:
+        """Initialize with the point count and the base code of each field."""
+        self.points = points
+        self._codes = {}
+        for field in AUTOMAT_FIELDS:
+            base = int(bases[field], 16)
+            for point in range(points):
+                self._codes[f"{base + point:04X}"] = (point, field)
+        self._values = {}
+        self._reading = None
+        self._complete = None
+        self.valid = False
+        self.version = 0
+        self.checksum = None
+
+    @property
+    def codes(self) -> list:
+        """Return all parameter codes of the table."""
+        return list(self._codes)
+
+    def handles(self, code: str) -> bool:
+        """Return True if the code belongs to the table."""
+        return code.upper() in self._codes
+
+    def begin_read(self, loop: asyncio.AbstractEventLoop) -> asyncio.Future:
+        """Start a bulk read and return a future resolved when all codes arrived."""
+        self._reading = {}
+        self._complete = loop.create_future()
+        return self._complete
+
+    def store(self, code: str, value) -> bool:
+        """Store a reply; return True if it completed the pending bulk read."""
+        key = self._codes.get(code.upper())
+        if key is None:
+            return False
+
+        if self._reading is None:
+            # Одиночный ответ вне пакетного чтения: обновляем кэш, если он актуален
+            self._values[key] = value
+            if self.valid:
+                self._update_checksum()
+            return False
+
+        self._reading[key] = value
+        if len(self._reading) < len(self._codes):
+            return False
+
+        self._values = self._reading
+        self._reading = None
+        self._update_checksum()
+        self.valid = True
+        return True
+
+    def _update_checksum(self) -> None:
+        """Recompute the checksum and bump the version if the table changed."""
+        checksum = zlib.crc32(json.dumps(sorted(self._values.items())).encode())
+        if checksum != self.checksum:
+            self.checksum = checksum
+            self.version += 1
+
+    def finish_read(self) -> None:
+        """Resolve or abandon the pending bulk read; call on the event loop."""
+        if self._complete is not None and not self._complete.done():
+            self._complete.set_result(True)
+        self._complete = None
+        self._reading = None
+
+    def invalidate(self) -> None:
+        """Mark the cache stale after a write to one of its codes."""
+        self.valid = False
+
+    def point(self, number) -> dict | None:
+        """Return the settings of a point if the cache is valid."""
+        if not self.valid or number is None:
+            return None
+        settings = {
+            field: self._values.get((number, field)) for field in AUTOMAT_FIELDS
+        }
+        if all(value is None for value in settings.values()):
+            return None
+        return settings
+
+    def as_dict(self) -> dict:
+        """Return the whole table for a service response."""
+        return {
+            "valid": self.valid,
+            "version": self.version,
+            "checksum": f"{self.checksum:08x}" if self.checksum is not None else None,
+            "points": [
+                {"point": point, **{
+                    field: self._values.get((point, field)) for field in AUTOMAT_FIELDS
+                }}
+                for point in range(self.points)
+            ],
+        }
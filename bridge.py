@@ -0,0 +1,93 @@
+"""HTTP control channel of the kotel_mqtt_service bridge."""
+import asyncio
+import logging
+import random
+import time
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+_LOGGER = logging.getLogger(__name__)
+
+BRIDGE_PORT = 9999  # kotel_mqtt.py runs on port 9999
+
+RECONNECT_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=3, sock_read=10)
+PROBE_TIMEOUT = aiohttp.ClientTimeout(total=5, connect=3, sock_read=3)
+
+BACKOFF_BASE = 5  # seconds
+BACKOFF_MAX = 300  # seconds
+
+
+class BridgeClient:
+    """Reconnect and health probe requests to the bridge over HA's shared session."""
+
+    def __init__(self, hass: HomeAssistant, host: str, port: int = BRIDGE_PORT) -> None:
+        """Initialize the client."""
+        self._session = async_get_clientsession(hass)
+        self._base_url = f"http://{host}:{port}"
+        self._reconnect_lock = asyncio.Lock()
+        self._attempts = 0
+        self._next_attempt = 0.0
+        self.available = None
+
+    @property
+    def reconnecting(self) -> bool:
+        """Return True while a reconnect request is in flight."""
+        return self._reconnect_lock.locked()
+
+    async def async_reconnect(self) -> bool:
+        """Ask the bridge to reconnect Bluetooth; concurrent requests are dropped."""
+        if self._reconnect_lock.locked():
+            _LOGGER.info("Bluetooth reconnect already in progress")
+            return False
+
+        async with self._reconnect_lock:
+            url = f"{self._base_url}/reconnect"
+            try:
+                _LOGGER.info("Sending Bluetooth reconnect request to %s", url)
+                async with self._session.get(url, timeout=RECONNECT_TIMEOUT) as response:
+                    if response.status == 200:
+                        _LOGGER.info("Bluetooth reconnect request sent successfully")
+                        return True
+                    _LOGGER.error("Bluetooth reconnect failed with status: %s", response.status)
+                    return False
+
+            except (aiohttp.ClientError, TimeoutError) as e:
+                _LOGGER.error("Error sending Bluetooth reconnect request: %s", e)
+                return False
+
+    async def async_probe(self) -> bool:
+        """Check that the bridge HTTP server answers at all."""
+        try:
+            async with self._session.get(f"{self._base_url}/health", timeout=PROBE_TIMEOUT) as response:
+                # Любой ответ кроме 5xx значит, что сервис моста жив
+                available = response.status < 500
+        except (aiohttp.ClientError, TimeoutError) as e:
+            _LOGGER.debug("Bridge health probe failed: %s", e)
+            available = False
+
+        if available != self.available:
+            _LOGGER.info("Bridge HTTP control channel %s",
+                         "available" if available else "unavailable")
+        self.available = available
+        return available
+
+    def reconnect_due(self) -> bool:
+        """Return True if an automatic reconnect may be attempted now."""
+        return not self._reconnect_lock.locked() and time.monotonic() >= self._next_attempt
+
+    def schedule_next_attempt(self) -> float:
+        """Count an automatic attempt and return the backoff delay before the next one."""
+        self._attempts += 1
+        ceiling = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self._attempts - 1))
+        # Случайная задержка в [ceiling/2, ceiling], чтобы попытки не шли в такт
+        delay = random.uniform(ceiling / 2, ceiling)
+        self._next_attempt = time.monotonic() + delay
+        return delay
+
+    def reset_backoff(self) -> None:
+        """Forget failed attempts once the connection is restored."""
+        self._attempts = 0
+        self._next_attempt = 0.0
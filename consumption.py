@@ -0,0 +1,112 @@
+"""Pellet consumption estimation for Kotel MQTT."""
+import time
+
+from .registry import BY_NAME
+
+# Максимальный интервал интегрирования (сек): при обрыве связи не
+# экстраполируем старый расход на многочасовую паузу в сообщениях
+MAX_INTEGRATION_GAP = 300
+
+
+# Уровень пламени (ADC), при котором горение считается погасшим
+FLAME_OFF_LEVEL = 0
+
+MODE_STOP = 0
+MODE_MANUAL = 1
+
+
+# Откуда взята скважность (атрибут source сенсоров расхода)
+SOURCE_STOP = "stop"
+SOURCE_NO_FLAME = "no_flame"
+SOURCE_THERMOSTAT = "thermostat"
+SOURCE_MANUAL = "fuel_supply/pause_duration"
+SOURCE_AUTOMAT_POINT = "automat_point"
+SOURCE_FALLBACK = "fuel_supply/pause_duration (fallback)"
+
+
+def feed_duty_cycle(data: dict, automat_settings: dict | None = None) -> tuple:
+    """Return (auger duty cycle 0..1 or None when unknown, source of the estimate).
+
+    Manual mode feeds with fuel_supply/pause_duration until the thermostat
+    setpoint is reached. Auto mode feeds with the settings of the current
+    automat point from a valid automat table; without one the manual
+    settings are used as a flame-gated approximation.
+    """
+    mode = data.get("operation_mode")
+    if mode is None:
+        return None, None
+    if mode == MODE_STOP:
+        return 0.0, SOURCE_STOP
+
+    flame_level = data.get("flame_level")
+    if flame_level is not None and flame_level <= FLAME_OFF_LEVEL:
+        return 0.0, SOURCE_NO_FLAME
+
+    if mode == MODE_MANUAL:
+        temperature = BY_NAME["temperature"].decode(data.get("temperature"))
+        thermostat = data.get("thermostat")
+        # Термостат ручного режима: выше уставки подача останавливается
+        if temperature is not None and thermostat is not None and temperature > thermostat:
+            return 0.0, SOURCE_THERMOSTAT
+        settings, source = data, SOURCE_MANUAL
+    elif automat_settings is not None:
+        settings, source = automat_settings, SOURCE_AUTOMAT_POINT
+    elif flame_level is None:
+        # Без таблицы автомата оценка по 0001/0002 допустима только при подтверждённом пламени
+        return None, None
+    else:
+        settings, source = data, SOURCE_FALLBACK
+
+    fuel_supply = settings.get("fuel_supply")
+    pause_duration = settings.get("pause_duration")
+    if fuel_supply is None or pause_duration is None:
+        return None, None
+    cycle = fuel_supply + pause_duration
+    if fuel_supply <= 0 or cycle <= 0:
+        return 0.0, source
+
+    return fuel_supply / cycle, source
+
+
+class PelletConsumption:
+    """Incrementally integrate burn rate into cumulative pellet consumption."""
+
+    def __init__(self, auger_capacity: float) -> None:
+        """Initialize with auger capacity in kg/h of continuous feed."""
+        self.auger_capacity = auger_capacity
+        self.duty_cycle = None
+        self.source = None
+        self.burn_rate = None
+        self.total = 0.0
+        self._last_update = None
+
+    def update(self, data: dict, automat_settings: dict | None = None,
+               now: float | None = None) -> None:
+        """Account for elapsed time at the previous rate, then take the new one."""
+        if now is None:
+            now = time.monotonic()
+
+        # Неизвестный расход не интегрируется: лучше недосчитать, чем завысить итог
+        if self._last_update is not None and self.burn_rate is not None:
+            elapsed = min(now - self._last_update, MAX_INTEGRATION_GAP)
+            if elapsed > 0:
+                self.total += self.burn_rate * elapsed / 3600
+
+        self._last_update = now
+        self.duty_cycle, self.source = feed_duty_cycle(data, automat_settings)
+        self.burn_rate = (
+            self.auger_capacity * self.duty_cycle if self.duty_cycle is not None else None
+        )
+
+    def restore_total(self, total: float) -> None:
+        """Restore cumulative consumption after a restart."""
+        self.total = max(self.total, total)
+
+    def as_data(self) -> dict:
+        """Return derived values keyed like entries of the data cache."""
+        return {
+            "feed_duty_cycle": round(self.duty_cycle * 100, 1) if self.duty_cycle is not None else None,
+            "burn_rate": round(self.burn_rate, 3) if self.burn_rate is not None else None,
+            "pellet_consumed": round(self.total, 3),
+            "feed_source": self.source,
+        }
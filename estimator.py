@@ -0,0 +1,82 @@
+"""Online heating-rate and time-to-target estimation for Kotel MQTT."""
+import math
+import time
+
+TIME_CONSTANT = 600  # seconds; вес старых точек убывает в e раз за 10 минут
+MIN_SAMPLES = 3
+MIN_SPAN = 60  # seconds
+
+
+class HeatingEstimator:
+    """Exponentially weighted linear fit of temperature over time, O(1) per reading."""
+
+    def __init__(self) -> None:
+        """Initialize an empty fit."""
+        self._mode = None
+        self._automat_point = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop the fit, e.g. after a change of operating regime."""
+        self._origin = None
+        self._start = None
+        self._last_time = None
+        self._samples = 0
+        self._sw = self._st = self._sy = self._stt = self._sty = 0.0
+        self.rate = None  # °C/min
+
+    def observe_regime(self, operation_mode, automat_point) -> None:
+        """Reset the fit when operation_mode or automat_point changes."""
+        if (operation_mode, automat_point) != (self._mode, self._automat_point):
+            if self._mode is not None or self._automat_point is not None:
+                self.reset()
+            self._mode = operation_mode
+            self._automat_point = automat_point
+
+    def add(self, temperature: float, now: float | None = None) -> None:
+        """Add a temperature reading in °C."""
+        if now is None:
+            now = time.monotonic()
+        if self._origin is None:
+            self._origin = now
+            self._start = now
+            self._last_time = now
+
+        decay = math.exp(-(now - self._last_time) / TIME_CONSTANT)
+        self._last_time = now
+        t = now - self._origin
+        if t > 4 * TIME_CONSTANT:
+            self._shift_origin(t)
+            t = 0.0
+
+        self._sw = self._sw * decay + 1
+        self._st = self._st * decay + t
+        self._sy = self._sy * decay + temperature
+        self._stt = self._stt * decay + t * t
+        self._sty = self._sty * decay + t * temperature
+        self._samples += 1
+
+        denominator = self._sw * self._stt - self._st * self._st
+        if self._samples < MIN_SAMPLES or now - self._start < MIN_SPAN or denominator <= 0:
+            self.rate = None
+            return
+
+        slope = (self._sw * self._sty - self._st * self._sy) / denominator
+        self.rate = slope * 60
+
+    def _shift_origin(self, shift: float) -> None:
+        """Move the time origin forward so sums stay numerically well-conditioned."""
+        self._origin += shift
+        self._stt += shift * shift * self._sw - 2 * shift * self._st
+        self._st -= shift * self._sw
+        self._sty -= shift * self._sy
+
+    def time_to_target(self, temperature: float | None, target: float | None) -> float | None:
+        """Return minutes until target is reached at the current rate."""
+        if temperature is None or target is None:
+            return None
+        if temperature >= target:
+            return 0.0
+        if self.rate is None or self.rate <= 0:
+            return None
+        return (target - temperature) / self.rate
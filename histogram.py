@@ -0,0 +1,53 @@
+"""Streaming histogram of message inter-arrival gaps."""
+import math
+
+MIN_GAP = 0.05  # seconds
+MAX_GAP = 600  # seconds
+BIN_COUNT = 64
+MAX_WEIGHT = 2000  # После этого веса счётчики уменьшаются вдвое, старые интервалы забываются
+
+
+class GapHistogram:
+    """Log-binned histogram with exponential aging and O(1) updates."""
+
+    def __init__(self) -> None:
+        """Initialize empty bins."""
+        self._counts = [0.0] * BIN_COUNT
+        self._total = 0.0
+        self._log_min = math.log(MIN_GAP)
+        self._log_step = (math.log(MAX_GAP) - self._log_min) / BIN_COUNT
+        self.samples = 0
+
+    def _bin(self, gap: float) -> int:
+        """Return the bin index for a gap."""
+        if gap <= MIN_GAP:
+            return 0
+        index = int((math.log(gap) - self._log_min) / self._log_step)
+        return min(index, BIN_COUNT - 1)
+
+    def _upper_edge(self, index: int) -> float:
+        """Return the upper bound of a bin in seconds."""
+        return math.exp(self._log_min + (index + 1) * self._log_step)
+
+    def add(self, gap: float) -> None:
+        """Record an inter-arrival gap in seconds."""
+        self._counts[self._bin(gap)] += 1
+        self._total += 1
+        self.samples += 1
+
+        if self._total >= MAX_WEIGHT:
+            self._counts = [count / 2 for count in self._counts]
+            self._total /= 2
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the gap below which the given fraction of samples falls."""
+        if self._total <= 0:
+            return None
+
+        target = self._total * fraction
+        cumulative = 0.0
+        for index, count in enumerate(self._counts):
+            cumulative += count
+            if cumulative >= target:
+                return self._upper_edge(index)
+        return self._upper_edge(BIN_COUNT - 1)
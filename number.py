@@ -5,6 +5,10 @@ from homeassistant.components.number import NumberEntity
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
+from .profiler import profiled
+from .registry import BY_NAME, specs_for_entity
+from .tracing import trace_mark, trace_start, trace_state_unchanged, trace_state_written
+
 DOMAIN = "kotel_mqtt"
 
 _LOGGER = logging.getLogger(__name__)
@@ -14,14 +18,9 @@ async def async_setup_platform(hass: HomeAssistant, config, async_add_entities,
     _LOGGER.info("Setting up Kotel MQTT number entities")
 
     numbers = [
-        # Параметры ручного режима (как в веб-клиенте)
-        KotelNumber(hass, 'fuel_supply', 'Подача топлива', 'сек', 'mdi:fuel', 0, 60, 1),
-        KotelNumber(hass, 'pause_duration', 'Пауза', 'сек', 'mdi:timer', 0, 120, 1),
-        KotelNumber(hass, 'fan_speed', 'Скорость вентилятора', '%', 'mdi:fan', 0, 25, 1),
-        KotelNumber(hass, 'thermostat', 'Установка термостата', '°C', 'mdi:thermometer-lines', 10, 90, 1),
-
-        # Параметры автоматического режима
-        KotelNumber(hass, 'stabilization_temperature', 'Температура стабилизации', '°C', 'mdi:thermometer', 10, 90, 1),
+        KotelNumber(hass, spec.name, spec.label, spec.unit, spec.icon,
+                    spec.min_value, spec.max_value, spec.step)
+        for spec in specs_for_entity('number')
     ]
 
     async_add_entities(numbers, True)
@@ -54,15 +53,20 @@ class KotelNumber(NumberEntity):
         self._handle_update()
 
     @callback
+    @profiled
     def _handle_update(self, param_name=None):
         """Handle update from dispatcher."""
         if param_name is None or param_name == self._param_type:
             if DOMAIN in self.hass.data:
+                trace_mark(self.hass, self._param_type, "dispatch")
                 data = self.hass.data[DOMAIN]['data']
                 new_value = data.get(self._param_type)
                 if new_value != self._value:
                     self._value = new_value
                     self.async_write_ha_state()
+                    trace_state_written(self.hass, self._param_type)
+                else:
+                    trace_state_unchanged(self.hass, self._param_type)
 
     @property
     def unique_id(self):
@@ -75,6 +79,7 @@ class KotelNumber(NumberEntity):
         return self._name
 
     @property
+    @profiled
     def value(self):
         """Return the current value."""
         return self._value
@@ -106,21 +111,13 @@ class KotelNumber(NumberEntity):
 
     async def async_set_value(self, value: float):
         """Set new value."""
-        # Map parameter type to parameter code
-        param_mapping = {
-            'fuel_supply': '0001',
-            'pause_duration': '0002',
-            'fan_speed': '0003',
-            'thermostat': '0004',
-            'stabilization_temperature': '0015',
-        }
-
-        param_code = param_mapping.get(self._param_type)
-        if param_code:
+        spec = BY_NAME.get(self._param_type)
+        if spec:
+            trace_start(self.hass, self._param_type, "entity")
             _LOGGER.info("Setting %s to %s", self.name, value)
             await self.hass.services.async_call(
                 DOMAIN, 'send_command',
-                {'cmd_type': 'set_param', 'param': param_code, 'value': int(value)}
+                {'cmd_type': 'set_param', 'param': spec.code, 'value': int(value)}
             )
         else:
             _LOGGER.error("Unknown parameter type: %s", self._param_type)
@@ -0,0 +1,148 @@
+"""On-demand timing of Kotel MQTT event-loop callbacks.
+
+While a session is active, every function wrapped with ``profiled`` records
+its wall time under the stack of profiled callers, e.g.
+``dispatcher;KotelSensor._handle_update;KotelSensor.state``. The
+report is written in the collapsed-stack format read by flamegraph.pl,
+speedscope and inferno. Outside a session the wrapper costs one global
+lookup.
+"""
+import asyncio
+import functools
+import threading
+import time
+
+PROFILE_FILE = "kotel_mqtt_profile_{}.folded"
+LAG_INTERVAL = 0.5  # seconds; период замера задержки цикла событий
+
+# Активная сессия хранится в модуле, а не в hass.data: обёртке нужен
+# доступ без hass, чтобы выключенный профилировщик ничего не стоил
+_session = None
+
+
+class ProfileSession:
+    """Per-callback and per-stack timings collected during one profiling run."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._callbacks = {}  # имя -> [вызовы, суммарно нс, максимум нс]
+        self._stacks = {}  # стек -> собственное время нс
+        self._lag = []
+        self._lag_handle = None
+        self.started = time.monotonic()
+
+    def call(self, name: str, func, args, kwargs):
+        """Run a callback and record its timing under the current stack."""
+        local = self._local
+        stack = getattr(local, "stack", None)
+        if stack is None:
+            stack = local.stack = []
+        stack.append([name, 0])
+
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            path = ";".join(frame[0] for frame in stack)
+            children = stack.pop()[1]
+            if stack:
+                stack[-1][1] += elapsed
+
+            with self._lock:
+                stats = self._callbacks.setdefault(name, [0, 0, 0])
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] = max(stats[2], elapsed)
+                self._stacks[path] = self._stacks.get(path, 0) + elapsed - children
+
+    def start_lag_sampling(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Measure how late call_later callbacks fire; call on the event loop."""
+        expected = loop.time() + LAG_INTERVAL
+
+        def sample():
+            nonlocal expected
+            now = loop.time()
+            self._lag.append(now - expected)
+            expected = now + LAG_INTERVAL
+            self._lag_handle = loop.call_later(LAG_INTERVAL, sample)
+
+        self._lag_handle = loop.call_later(LAG_INTERVAL, sample)
+
+    def stop_lag_sampling(self) -> None:
+        """Cancel loop-lag sampling."""
+        if self._lag_handle is not None:
+            self._lag_handle.cancel()
+            self._lag_handle = None
+
+    def folded(self) -> str:
+        """Return stacks in collapsed format with self time in microseconds."""
+        with self._lock:
+            stacks = sorted(self._stacks.items())
+        return "".join(
+            f"kotel_mqtt;{path} {ns // 1000}\n" for path, ns in stacks if ns >= 1000
+        )
+
+    def summary(self) -> dict:
+        """Return per-callback statistics and loop lag for a service response."""
+        with self._lock:
+            callbacks = {
+                name: {
+                    "calls": calls,
+                    "total_ms": round(total / 1e6, 3),
+                    "max_ms": round(peak / 1e6, 3),
+                }
+                for name, (calls, total, peak) in sorted(
+                    self._callbacks.items(), key=lambda item: -item[1][1]
+                )
+            }
+        lag = sorted(self._lag)
+        return {
+            "duration": round(time.monotonic() - self.started, 1),
+            "callbacks": callbacks,
+            "loop_lag": {
+                "samples": len(lag),
+                "mean_ms": round(sum(lag) / len(lag) * 1000, 3) if lag else None,
+                "p99_ms": round(lag[int(0.99 * (len(lag) - 1))] * 1000, 3) if lag else None,
+                "max_ms": round(lag[-1] * 1000, 3) if lag else None,
+            },
+        }
+
+
+def profiled(func, name: str | None = None):
+    """Wrap a function so its calls are timed while a session is active."""
+    name = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        session = _session
+        if session is None:
+            return func(*args, **kwargs)
+        return session.call(name, func, args, kwargs)
+
+    return wrapper
+
+
+def start_session() -> ProfileSession | None:
+    """Activate a new session; return None if one is already running."""
+    global _session  # noqa: PLW0603
+    if _session is not None:
+        return None
+    _session = ProfileSession()
+    return _session
+
+
+def stop_session() -> None:
+    """Deactivate the running session."""
+    global _session  # noqa: PLW0603
+    if _session is not None:
+        _session.stop_lag_sampling()
+    _session = None
+
+
+def write_report(path: str, folded: str) -> None:
+    """Write a collapsed-stack report; runs in the executor."""
+    with open(path, "w", encoding="utf-8") as report_file:
+        report_file.write(folded)
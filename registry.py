@@ -0,0 +1,105 @@
+"""Registry of kotel parameters and variables for Kotel MQTT.
+
+Single source of truth for codes, names, scaling, limits and the entity
+kind of every value the integration knows. Built once at import time with
+code -> spec and name -> spec indexes.
+"""
+
+PARAM = "param"  # Параметр: читается get_param, пишется set_param
+VAR = "var"  # Переменная: только чтение get_var
+
+
+class ParamSpec:
+    """Description of one controller parameter or variable."""
+
+    def __init__(self, code, name, kind, entity, label, unit='', icon=None,
+                 scale=1, min_value=None, max_value=None, step=1, options=()) -> None:
+        """Initialize the spec."""
+        self.code = code
+        self.name = name
+        self.kind = kind
+        self.entity = entity
+        self.label = label
+        self.unit = unit
+        self.icon = icon
+        self.scale = scale
+        self.min_value = min_value
+        self.max_value = max_value
+        self.step = step
+        self.options = options
+
+    @property
+    def writable(self) -> bool:
+        """Return True if the value can be written with set_param."""
+        return self.kind == PARAM
+
+    @property
+    def read_command(self) -> str:
+        """Return the command type that reads the value."""
+        return "get_param" if self.kind == PARAM else "get_var"
+
+    def decode(self, raw):
+        """Convert a raw controller value to display units."""
+        if raw is None or self.scale == 1:
+            return raw
+        # Округление убирает хвосты двоичной арифметики: 645 * 0.1 -> 64.5
+        return round(raw * self.scale, 6)
+
+    def clamp(self, value: int) -> int:
+        """Limit a value to the allowed range."""
+        if self.min_value is not None:
+            value = max(self.min_value, value)
+        if self.max_value is not None:
+            value = min(self.max_value, value)
+        return value
+
+    def validate(self, value) -> str | None:
+        """Return an error message if the value may not be written, else None."""
+        if not self.writable:
+            return f"{self.name} ({self.code}) is read-only"
+        if not isinstance(value, int) or isinstance(value, bool):
+            return f"{self.name} ({self.code}) requires an integer, got {value!r}"
+        if self.min_value is not None and value < self.min_value:
+            return f"{self.name} ({self.code}) must be >= {self.min_value}, got {value}"
+        if self.max_value is not None and value > self.max_value:
+            return f"{self.name} ({self.code}) must be <= {self.max_value}, got {value}"
+        return None
+
+
+# Полное соответствие параметров из клиента
+PARAMS = (
+    # Основные параметры
+    ParamSpec("0001", "fuel_supply", PARAM, "number", "Подача топлива", "сек", "mdi:fuel",
+              min_value=0, max_value=60),
+    ParamSpec("0002", "pause_duration", PARAM, "number", "Пауза", "сек", "mdi:timer",
+              min_value=0, max_value=120),
+    ParamSpec("0003", "fan_speed", PARAM, "number", "Скорость вентилятора", "%", "mdi:fan",
+              min_value=0, max_value=25),
+    ParamSpec("0004", "thermostat", PARAM, "number", "Установка термостата", "°C",
+              "mdi:thermometer-lines", min_value=10, max_value=90),
+    ParamSpec("0007", "ignition", PARAM, "switch", "Розжиг котла", icon="mdi:fire",
+              min_value=0, max_value=1, options=("Выкл", "Вкл")),
+    ParamSpec("0015", "stabilization_temperature", PARAM, "number", "Температура стабилизации",
+              "°C", "mdi:thermometer", min_value=10, max_value=90),
+    ParamSpec("001D", "operation_mode", PARAM, "select", "Режим работы котла", icon="mdi:cog",
+              min_value=0, max_value=2, options=("Стоп", "Ручной", "Авто")),
+
+    # Переменные (данные в реальном времени)
+    ParamSpec("04", "temperature", VAR, "sensor", "Температура котла", "°C", "mdi:thermometer",
+              scale=0.1),  # Температура носителя (°C×10)
+    ParamSpec("09", "flame_level", VAR, "sensor", "Уровень пламени", "ADC", "mdi:fire"),
+    ParamSpec("11", "automat_point", VAR, "sensor", "Номер точки автомата", "", "mdi:chart-line"),
+)
+
+BY_CODE = {spec.code: spec for spec in PARAMS}
+BY_NAME = {spec.name: spec for spec in PARAMS}
+
+
+def spec_for_code(code: str) -> ParamSpec | None:
+    """Return the spec of a code, accepting any letter case."""
+    return BY_CODE.get(code.upper())
+
+
+def specs_for_entity(entity: str) -> list:
+    """Return specs exposed as the given entity kind, in registry order."""
+    return [spec for spec in PARAMS if spec.entity == entity]
@@ -5,6 +5,10 @@ from homeassistant.components.select import SelectEntity
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
+from .profiler import profiled
+from .registry import BY_NAME, specs_for_entity
+from .tracing import trace_mark, trace_start, trace_state_unchanged, trace_state_written
+
 DOMAIN = "kotel_mqtt"
 
 _LOGGER = logging.getLogger(__name__)
@@ -14,7 +18,8 @@ async def async_setup_platform(hass: HomeAssistant, config, async_add_entities,
     _LOGGER.info("Setting up Kotel MQTT select entities")
 
     selects = [
-        KotelModeSelect(hass, 'operation_mode', 'Режим работы котла', 'mdi:cog'),
+        KotelModeSelect(hass, spec.name, spec.label, spec.icon)
+        for spec in specs_for_entity('select')
     ]
 
     async_add_entities(selects, True)
@@ -31,8 +36,9 @@ class KotelModeSelect(SelectEntity):
         self._current_option = None
         self._unique_id = f"kotel_mqtt_{select_type}_select"
 
-        # Options like in web client
-        self._options = ['Стоп', 'Ручной', 'Авто']
+        # Options like in web client, indexed by the numeric value
+        self._spec = BY_NAME[select_type]
+        self._options = list(self._spec.options)
 
     async def async_added_to_hass(self):
         """Register callbacks."""
@@ -45,26 +51,27 @@ class KotelModeSelect(SelectEntity):
         self._handle_update()
 
     @callback
+    @profiled
     def _handle_update(self, param_name=None):
         """Handle update from dispatcher."""
         if param_name is None or param_name == self._select_type:
             if DOMAIN in self.hass.data:
+                trace_mark(self.hass, self._select_type, "dispatch")
                 data = self.hass.data[DOMAIN]['data']
                 mode = data.get(self._select_type, 0)
 
                 # Map numeric mode to text option
-                if mode == 0:
-                    new_option = 'Стоп'
-                elif mode == 1:
-                    new_option = 'Ручной'
-                elif mode == 2:
-                    new_option = 'Авто'
+                if isinstance(mode, int) and 0 <= mode < len(self._options):
+                    new_option = self._options[mode]
                 else:
-                    new_option = 'Стоп'
+                    new_option = self._options[0]
 
                 if new_option != self._current_option:
                     self._current_option = new_option
                     self.async_write_ha_state()
+                    trace_state_written(self.hass, self._select_type)
+                else:
+                    trace_state_unchanged(self.hass, self._select_type)
 
     @property
     def unique_id(self):
@@ -77,6 +84,7 @@ class KotelModeSelect(SelectEntity):
         return self._name
 
     @property
+    @profiled
     def current_option(self):
         """Return the current selected option."""
         return self._current_option
@@ -93,19 +101,13 @@ class KotelModeSelect(SelectEntity):
 
     async def async_select_option(self, option: str):
         """Select new option."""
-        # Map text option to numeric mode
-        mode_mapping = {
-            'Стоп': 0,
-            'Ручной': 1,
-            'Авто': 2
-        }
-
-        mode = mode_mapping.get(option)
-        if mode is not None:
+        if option in self._options:
+            mode = self._options.index(option)
+            trace_start(self.hass, self._select_type, "entity")
             _LOGGER.info("Setting mode to: %s", option)
             await self.hass.services.async_call(
                 DOMAIN, 'send_command',
-                {'cmd_type': 'set_param', 'param': '001D', 'value': mode}
+                {'cmd_type': 'set_param', 'param': self._spec.code, 'value': mode}
             )
         else:
             _LOGGER.error("Unknown mode option: %s", option)
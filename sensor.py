@@ -1,23 +1,41 @@
 """Sensor platform for Kotel MQTT."""
 import logging
+import time
 
+from homeassistant.components.sensor import (
+    RestoreSensor,
+    SensorDeviceClass,
+    SensorStateClass,
+)
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import Entity
 
+from .profiler import profiled
+from .registry import BY_NAME, specs_for_entity
+
 DOMAIN = "kotel_mqtt"
 
 _LOGGER = logging.getLogger(__name__)
 
+STATUS_SENSORS = ['connection_status', 'bluetooth_status', 'last_message_time', 'bridge_status']
+
+# Показания котла пишутся в машину состояний не чаще раза в секунду;
+# полный поток доступен через websocket kotel_mqtt/subscribe_telemetry
+MIN_STATE_INTERVAL = 1.0  # seconds
+
 async def async_setup_platform(hass: HomeAssistant, config, async_add_entities, discovery_info=None):
     """Set up Kotel MQTT sensors."""
     _LOGGER.info("Setting up Kotel MQTT sensors")
 
     sensors = [
         # Основные показатели (как в веб-клиенте)
-        KotelSensor(hass, 'temperature', 'Температура котла', '°C', 'mdi:thermometer'),
-        KotelSensor(hass, 'flame_level', 'Уровень пламени', 'ADC', 'mdi:fire'),
-        KotelSensor(hass, 'automat_point', 'Номер точки автомата', '', 'mdi:chart-line'),
+        *[
+            KotelSensor(hass, spec.name, spec.label, spec.unit, spec.icon)
+            for spec in specs_for_entity('sensor')
+        ],
+        KotelSensor(hass, 'heating_rate', 'Скорость нагрева', '°C/мин', 'mdi:thermometer-chevron-up'),
+        KotelSensor(hass, 'time_to_target', 'Время до уставки', 'мин', 'mdi:timer-sand'),
 
         # Параметры ручного режима
         #KotelSensor(hass, 'fuel_supply', 'Подача топлива', 'сек', 'mdi:fuel'),
@@ -34,6 +52,15 @@ async def async_setup_platform(hass: HomeAssistant, config, async_add_entities,
         KotelSensor(hass, 'connection_status', 'Статус MQTT подключения', '', 'mdi:connection'),
         KotelSensor(hass, 'bluetooth_status', 'Статус Bluetooth подключения', '', 'mdi:bluetooth'),
         KotelSensor(hass, 'last_message_time', 'Время последнего сообщения', '', 'mdi:clock'),
+        KotelSensor(hass, 'bridge_status', 'Статус сервиса котла', '', 'mdi:server-network'),
+
+        # Расчётный расход пеллет
+        KotelConsumptionSensor(hass, 'feed_duty_cycle', 'Скважность подачи', '%', 'mdi:percent',
+                               SensorStateClass.MEASUREMENT),
+        KotelConsumptionSensor(hass, 'burn_rate', 'Расход пеллет', 'kg/h', 'mdi:speedometer',
+                               SensorStateClass.MEASUREMENT),
+        KotelConsumptionSensor(hass, 'pellet_consumed', 'Израсходовано пеллет', 'kg', 'mdi:grain',
+                               SensorStateClass.TOTAL_INCREASING, SensorDeviceClass.WEIGHT),
     ]
 
     async_add_entities(sensors, True)
@@ -50,14 +77,17 @@ class KotelSensor(Entity):
         self._unit_of_measurement = unit
         self._icon = icon
         self._state = None
+        self._attributes = None
         self._unique_id = f"kotel_mqtt_{sensor_type}"
+        self._last_write = 0.0
+        self._throttle_handle = None
 
     async def async_added_to_hass(self):
         """Register callbacks."""
         _LOGGER.debug("Sensor %s added to HA", self.name)
 
         # For status sensors
-        if self._sensor_type in ['connection_status', 'bluetooth_status', 'last_message_time']:
+        if self._sensor_type in STATUS_SENSORS:
             self.async_on_remove(
                 async_dispatcher_connect(
                     self.hass, f"{DOMAIN}_status_update", self._handle_update
@@ -71,22 +101,36 @@ class KotelSensor(Entity):
                 )
             )
 
+        self.async_on_remove(self._cancel_throttle)
+
         # Initial update
         self._handle_update()
 
     @callback
+    @profiled
     def _handle_update(self, param_name=None):
         """Handle update from dispatcher."""
         if DOMAIN not in self.hass.data:
             return
 
         config = self.hass.data[DOMAIN]
+        new_attributes = None
 
         # Handle status sensors
         if self._sensor_type == 'connection_status':
             new_state = "Подключено" if config.get("connected", False) else "Отключено"
         elif self._sensor_type == 'bluetooth_status':
             new_state = "Подключено" if config.get("bluetooth_connected", False) else "Отключено"
+            new_attributes = {
+                "timeout_threshold": config["effective_bluetooth_timeout"],
+                "message_gap_p99": config["message_gap_percentile"],
+            }
+        elif self._sensor_type == 'bridge_status':
+            available = config["bridge"].available
+            if available is None:
+                new_state = "Неизвестно"
+            else:
+                new_state = "Доступен" if available else "Недоступен"
         elif self._sensor_type == 'last_message_time':
             last_msg = config.get("last_kotel_message")
             if last_msg:
@@ -95,11 +139,45 @@ class KotelSensor(Entity):
                 new_state = "Никогда"
         else:
             new_state = config['data'].get(self._sensor_type)
+            if self._sensor_type == 'automat_point' and config["automat_table"] is not None:
+                # Настройки текущей точки из кэша таблицы автомата
+                new_attributes = config["automat_table"].point(new_state)
 
-        if new_state != self._state:
+        if new_state != self._state or new_attributes != self._attributes:
+            if self._throttled():
+                return
             self._state = new_state
+            self._attributes = new_attributes
             self.async_write_ha_state()
 
+    def _throttled(self):
+        """Return True if a data sensor was written too recently; retry later."""
+        if self._sensor_type in STATUS_SENSORS:
+            return False
+
+        now = time.monotonic()
+        remaining = self._last_write + MIN_STATE_INTERVAL - now
+        if remaining <= 0:
+            self._last_write = now
+            return False
+
+        if self._throttle_handle is None:
+            self._throttle_handle = self.hass.loop.call_later(remaining, self._flush_throttled)
+        return True
+
+    @callback
+    def _flush_throttled(self):
+        """Write the latest value deferred by the rate limit."""
+        self._throttle_handle = None
+        self._handle_update()
+
+    @callback
+    def _cancel_throttle(self):
+        """Cancel a deferred write."""
+        if self._throttle_handle is not None:
+            self._throttle_handle.cancel()
+            self._throttle_handle = None
+
     @property
     def unique_id(self):
         """Return unique ID."""
@@ -111,27 +189,26 @@ class KotelSensor(Entity):
         return self._name
 
     @property
+    @profiled
     def state(self):
         """Return the state of the sensor."""
-        # Convert temperature from deci-Celsius to Celsius
-        if self._sensor_type == 'temperature' and self._state is not None:
-            return float(self._state) / 10
-
-        # Convert operation mode to readable text
-        if self._sensor_type == 'operation_mode':
-            if self._state == 0:
-                return 'Стоп'
-            if self._state == 1:
-                return 'Ручной'
-            if self._state == 2:
-                return 'Авто'
+        spec = BY_NAME.get(self._sensor_type)
+        if spec is None:
+            return self._state
+
+        # Convert enumerated values (operation mode, ignition) to readable text
+        if spec.options:
+            if isinstance(self._state, int) and 0 <= self._state < len(spec.options):
+                return spec.options[self._state]
             return 'Неизвестно'
 
-        # Convert ignition status to readable text
-        if self._sensor_type == 'ignition':
-            return 'Вкл' if self._state == 1 else 'Выкл'
+        # Convert scaled values, e.g. temperature from deci-Celsius to Celsius
+        return spec.decode(self._state)
 
-        return self._state
+    @property
+    def extra_state_attributes(self):
+        """Return diagnostic attributes."""
+        return self._attributes
 
     @property
     def unit_of_measurement(self):
@@ -147,3 +224,65 @@ class KotelSensor(Entity):
     def should_poll(self):
         """No polling needed."""
         return False
+
+
+class KotelConsumptionSensor(RestoreSensor):
+    """Representation of a derived pellet consumption sensor."""
+
+    def __init__(self, hass: HomeAssistant, sensor_type, name, unit, icon,
+                 state_class, device_class=None) -> None:
+        """Initialize the sensor."""
+        self.hass = hass
+        self._sensor_type = sensor_type
+        self._attr_name = name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_icon = icon
+        self._attr_state_class = state_class
+        self._attr_device_class = device_class
+        self._attr_native_value = None
+        self._attr_extra_state_attributes = None
+        self._attr_unique_id = f"kotel_mqtt_{sensor_type}"
+        self._attr_should_poll = False
+
+    async def async_added_to_hass(self):
+        """Restore the cumulative total and register callbacks."""
+        _LOGGER.debug("Sensor %s added to HA", self.name)
+
+        if self._attr_state_class == SensorStateClass.TOTAL_INCREASING:
+            last_data = await self.async_get_last_sensor_data()
+            if last_data is not None and last_data.native_value is not None and DOMAIN in self.hass.data:
+                try:
+                    total = float(last_data.native_value)
+                except (TypeError, ValueError):
+                    total = None
+                if total is not None:
+                    consumption = self.hass.data[DOMAIN]["consumption"]
+                    consumption.restore_total(total)
+                    self.hass.data[DOMAIN]["data"].update(consumption.as_data())
+
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, f"{DOMAIN}_update", self._handle_update
+            )
+        )
+        self._handle_update()
+
+    @callback
+    @profiled
+    def _handle_update(self, param_name=None):
+        """Handle update from dispatcher."""
+        if param_name is not None and param_name not in (self._sensor_type, "feed_source"):
+            return
+        if DOMAIN not in self.hass.data:
+            return
+
+        data = self.hass.data[DOMAIN]['data']
+        new_value = data.get(self._sensor_type)
+        new_attributes = None
+        if self._sensor_type != "pellet_consumed":
+            # Источник оценки: точка автомата, настройки подачи или их замена в авто-режиме
+            new_attributes = {"source": data.get("feed_source")}
+        if new_value != self._attr_native_value or new_attributes != self._attr_extra_state_attributes:
+            self._attr_native_value = new_value
+            self._attr_extra_state_attributes = new_attributes
+            self.async_write_ha_state()
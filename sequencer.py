@@ -0,0 +1,101 @@
+"""Ordering of bridge replies against parameter writes for Kotel MQTT."""
+from collections import deque
+import itertools
+import threading
+import time
+
+# Ответ, не пришедший за это время, считается потерянным и больше не учитывается
+STALE_WINDOW = 30  # seconds
+
+# Оценка времени ответа как в TCP (RFC 6298): сглаженное среднее + 4 отклонения
+INITIAL_ROUND_TRIP = 3.0  # seconds
+MIN_ROUND_TRIP = 1.0  # seconds
+RTT_GAIN = 0.125
+RTTVAR_GAIN = 0.25
+
+
+class CommandSequencer:
+    """Track commands per code and discard replies to reads older than the newest write.
+
+    Every command gets a sequence number that is sent in the payload. If the
+    bridge echoes ``seq`` in its reply, the reply is accepted only if it is not
+    older than the newest write to that code. Otherwise replies for a code are
+    assumed to come back in request order: reads sent within the expected
+    round trip before a write are marked stale, and that many following
+    replies for the code are dropped. Older reads are taken as lost, so a
+    Bluetooth drop does not make fresh replies look stale.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty tracking."""
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._last_write = {}
+        self._outstanding = {}
+        self._stale = {}
+        self._srtt = None
+        self._rttvar = None
+        self.dropped = 0
+
+    @property
+    def round_trip_timeout(self) -> float:
+        """Return how long a reply may take before its request counts as lost."""
+        if self._srtt is None:
+            return INITIAL_ROUND_TRIP
+        return max(MIN_ROUND_TRIP, self._srtt + 4 * self._rttvar)
+
+    def sent(self, cmd_type: str, code: str) -> int:
+        """Register an outgoing command and return its sequence number."""
+        now = time.monotonic()
+        with self._lock:
+            seq = next(self._counter)
+            self._purge(code, now)
+            outstanding = self._outstanding.setdefault(code, deque())
+            if cmd_type == "set_param":
+                self._last_write[code] = seq
+                in_flight = now - self.round_trip_timeout
+                self._stale.setdefault(code, deque()).extend(
+                    sent_at for sent_at in outstanding if sent_at >= in_flight
+                )
+                outstanding.clear()
+            else:
+                outstanding.append(now)
+            return seq
+
+    def accept(self, code: str, reply_seq=None) -> bool:
+        """Return False if a reply for the code predates the newest write."""
+        now = time.monotonic()
+        with self._lock:
+            if isinstance(reply_seq, int):
+                accepted = reply_seq >= self._last_write.get(code, 0)
+            else:
+                self._purge(code, now)
+                stale = self._stale.get(code)
+                outstanding = self._outstanding.get(code)
+                if stale:
+                    stale.popleft()
+                    accepted = False
+                else:
+                    if outstanding:
+                        self._sample_round_trip(now - outstanding.popleft())
+                    accepted = True
+
+            if not accepted:
+                self.dropped += 1
+            return accepted
+
+    def _sample_round_trip(self, sample: float) -> None:
+        """Update the round-trip estimate; caller holds the lock."""
+        if self._srtt is None:
+            self._srtt = sample
+            self._rttvar = sample / 2
+        else:
+            self._rttvar += RTTVAR_GAIN * (abs(self._srtt - sample) - self._rttvar)
+            self._srtt += RTT_GAIN * (sample - self._srtt)
+
+    def _purge(self, code: str, now: float) -> None:
+        """Forget requests whose replies are overdue; caller holds the lock."""
+        expired = now - STALE_WINDOW
+        for pending in (self._stale.get(code), self._outstanding.get(code)):
+            while pending and pending[0] < expired:
+                pending.popleft()
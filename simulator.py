@@ -0,0 +1,573 @@
+"""Simulator of the kotel_mqtt_service bridge for load and soak testing.
+
+The simulator itself has no Home Assistant dependencies. It provides an
+in-process MQTT broker stand-in whose clients follow the aiomqtt API (and so
+plug into ``DirectMqttTransport`` as a ``client_factory``), a simple thermal
+and combustion model of the boiler, and the bridge protocol on top of it.
+
+Run standalone for a soak test of the simulator with a polling probe:
+
+    python -P simulator.py --duration 3600 --rate 10 --drop-rate 0.001
+
+With ``--integration`` the soak runs the integration's own MQTT ingest,
+Bluetooth watchdog, polling and optimistic writes against the simulator
+instead of the probe. This mode needs Home Assistant installed and the
+integration directory importable as a package.
+
+(``-P`` keeps the integration's ``select.py`` from shadowing the stdlib.)
+"""
+import argparse
+import asyncio
+from collections import namedtuple
+import importlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+DEFAULT_TOPIC_PREFIX = "kotel"
+
+Message = namedtuple("Message", ["topic", "payload"])
+
+# Имена параметров протокола моста (как в ответах kotel_mqtt_service)
+PARAM_NAMES = {
+    "0001": "Подача топлива",
+    "0002": "Пауза",
+    "0003": "Скорость вентилятора",
+    "0004": "Термостат",
+    "0007": "Розжиг",
+    "0015": "Температура стабилизации",
+    "001D": "Режим работы",
+    "04": "Температура",
+    "09": "Уровень пламени",
+    "11": "Точка автомата",
+}
+
+
+class InProcessBroker:
+    """Minimal MQTT broker stand-in: exact topics and a trailing '#' wildcard."""
+
+    def __init__(self) -> None:
+        """Initialize the broker."""
+        self._subscriptions = {}
+
+    def client(self) -> "InProcessClient":
+        """Return a new client; usable as a DirectMqttTransport client factory."""
+        return InProcessClient(self)
+
+    def subscribe(self, topic: str, queue: asyncio.Queue) -> None:
+        """Register a queue for a topic filter."""
+        self._subscriptions.setdefault(topic, set()).add(queue)
+
+    def unsubscribe_all(self, queue: asyncio.Queue) -> None:
+        """Remove a queue from every topic filter."""
+        for queues in self._subscriptions.values():
+            queues.discard(queue)
+
+    def publish(self, topic: str, payload) -> None:
+        """Deliver a message to every matching subscriber."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        message = Message(topic, payload)
+        for topic_filter, queues in self._subscriptions.items():
+            if topic_filter == topic or (
+                topic_filter.endswith("#") and topic.startswith(topic_filter[:-1])
+            ):
+                for queue in queues:
+                    queue.put_nowait(message)
+
+
+class InProcessClient:
+    """Client of InProcessBroker with the subset of the aiomqtt API in use."""
+
+    def __init__(self, broker: InProcessBroker) -> None:
+        """Initialize the client."""
+        self._broker = broker
+        self._queue = asyncio.Queue()
+
+    async def __aenter__(self) -> "InProcessClient":
+        """Connect."""
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Disconnect."""
+        self._broker.unsubscribe_all(self._queue)
+
+    async def subscribe(self, topic: str, qos: int = 0) -> None:
+        """Subscribe to a topic filter."""
+        self._broker.subscribe(topic, self._queue)
+
+    async def publish(self, topic: str, payload, qos: int = 0) -> None:
+        """Publish a message."""
+        self._broker.publish(topic, payload)
+
+    @property
+    async def messages(self):
+        """Iterate over received messages."""
+        while True:
+            yield await self._queue.get()
+
+
+class BoilerModel:
+    """Lumped thermal and combustion model of a pellet boiler."""
+
+    AMBIENT = 15.0  # °C
+    HEAT_CAPACITY = 400.0  # kJ/°C, вода в котле и контуре
+    LOSS = 0.25  # kW/°C, потери в отопление
+    FEED_RATE = 3.3  # g/s при работе шнека
+    ENERGY = 17.0  # kJ/g, теплота сгорания пеллет
+    BURN_CONSTANT = 0.02  # 1/s при полном дутье
+
+    def __init__(self) -> None:
+        """Initialize a cold, stopped boiler."""
+        self.params = {
+            "0001": 5,
+            "0002": 30,
+            "0003": 15,
+            "0004": 70,
+            "0007": 0,
+            "0015": 65,
+            "001D": 0,
+        }
+        self.temperature = 20.0
+        self.grate_fuel = 0.0  # g
+        self.burning = False
+        self.burn_rate = 0.0  # g/s
+        self.automat_point = 0
+        self._cycle_time = 0.0
+
+    @property
+    def flame_level(self) -> int:
+        """Return the flame sensor reading (ADC)."""
+        return min(1023, int(self.burn_rate * 600))
+
+    def variables(self) -> dict:
+        """Return real-time variables as the controller reports them."""
+        return {
+            "04": int(round(self.temperature * 10)),
+            "09": self.flame_level,
+            "11": self.automat_point,
+        }
+
+    def _feed_settings(self) -> tuple:
+        """Return (fuel_supply, pause, fan_speed) for the current mode."""
+        mode = self.params["001D"]
+        if mode == 0:
+            return 0, 1, 0
+        if mode == 1:
+            # Термостат ручного режима: при перегреве подача останавливается
+            if self.temperature > self.params["0004"]:
+                return 0, 1, self.params["0003"]
+            return self.params["0001"], self.params["0002"], self.params["0003"]
+
+        # Авто: чем ближе к температуре стабилизации, тем ниже точка автомата
+        delta = self.params["0015"] - self.temperature
+        self.automat_point = max(0, min(9, int(delta / 2)))
+        fuel_supply = 2 + self.automat_point
+        pause = 60 - 5 * self.automat_point
+        fan = 8 + self.automat_point
+        return fuel_supply, pause, fan
+
+    def step(self, dt: float) -> None:
+        """Advance the model by dt seconds."""
+        fuel_supply, pause, fan = self._feed_settings()
+
+        # Работа шнека: подача fuel_supply секунд, затем пауза
+        cycle = fuel_supply + pause
+        if fuel_supply > 0 and cycle > 0:
+            self._cycle_time = (self._cycle_time + dt) % cycle
+            if self._cycle_time < fuel_supply:
+                self.grate_fuel += self.FEED_RATE * dt
+
+        if self.params["0007"] and self.grate_fuel > 1:
+            self.burning = True
+
+        if self.burning:
+            self.burn_rate = self.grate_fuel * self.BURN_CONSTANT * (0.2 + fan / 25)
+            self.grate_fuel = max(0.0, self.grate_fuel - self.burn_rate * dt)
+            if self.grate_fuel <= 0.1:
+                self.burning = False
+        else:
+            self.burn_rate = 0.0
+
+        heat = self.burn_rate * self.ENERGY - self.LOSS * (self.temperature - self.AMBIENT)
+        self.temperature += heat * dt / self.HEAT_CAPACITY
+
+
+class BridgeSimulator:
+    """kotel_mqtt_service bridge protocol driven by BoilerModel."""
+
+    def __init__(
+        self,
+        broker: InProcessBroker,
+        topic_prefix: str = DEFAULT_TOPIC_PREFIX,
+        telemetry_rate: float = 0.0,
+        latency: tuple = (0.05, 0.3),
+        drop_rate: float = 0.0,
+        drop_duration: tuple = (5.0, 30.0),
+        time_scale: float = 1.0,
+        echo_seq: bool = False,
+        seed: int | None = None,
+    ) -> None:
+        """Initialize the simulator.
+
+        ``telemetry_rate`` is the unsolicited variable rate in Hz (0 = replies
+        only), ``latency`` the Bluetooth round trip range in seconds,
+        ``drop_rate`` the probability per second of a Bluetooth drop and
+        ``time_scale`` how many model seconds pass per wall-clock second.
+        ``echo_seq`` returns the command's ``seq`` in the reply.
+        """
+        self.broker = broker
+        self.model = BoilerModel()
+        self.topic_prefix = topic_prefix
+        self.telemetry_rate = telemetry_rate
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.drop_duration = drop_duration
+        self.time_scale = time_scale
+        self.echo_seq = echo_seq
+        self.random = random.Random(seed)
+        self.bluetooth_connected = True
+        self.stats = {"commands": 0, "replies": 0, "dropped": 0, "telemetry": 0, "drops": 0}
+        self._reconnect_at = None
+        self._tasks = []
+
+    @property
+    def data_topic(self) -> str:
+        """Return the topic the bridge publishes to."""
+        return f"{self.topic_prefix}/data"
+
+    async def start(self) -> None:
+        """Start the protocol, model and telemetry loops."""
+        client = self.broker.client()
+        await client.subscribe(f"{self.topic_prefix}/control")
+        await client.subscribe(f"{self.topic_prefix}/status_request")
+        self._tasks = [
+            asyncio.create_task(self._serve(client)),
+            asyncio.create_task(self._run_model()),
+        ]
+        if self.telemetry_rate > 0:
+            self._tasks.append(asyncio.create_task(self._emit_telemetry()))
+        self._publish_status()
+
+    async def stop(self) -> None:
+        """Stop all loops."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def reconnect(self) -> None:
+        """Restore Bluetooth, as the bridge's /reconnect endpoint does."""
+        self.bluetooth_connected = True
+        self._reconnect_at = None
+        self._publish_status()
+
+    def _publish_status(self) -> None:
+        """Publish a status message."""
+        self.broker.publish(self.data_topic, json.dumps({
+            "type": "status",
+            "status": "connected",
+            "message": "Bluetooth connected" if self.bluetooth_connected else "Bluetooth disconnected",
+            "bluetooth_connected": self.bluetooth_connected,
+        }))
+
+    def _publish_value(self, code: str, value: int, seq=None) -> None:
+        """Publish a parameter or variable value in the bridge format."""
+        payload = {
+            "name": {"code": f"0x{code}", "name": PARAM_NAMES.get(code, code)},
+            "value": value,
+        }
+        if seq is not None:
+            payload["seq"] = seq
+        self.broker.publish(self.data_topic, json.dumps(payload))
+
+    async def _serve(self, client: InProcessClient) -> None:
+        """Answer control commands and status requests."""
+        async for message in client.messages:
+            try:
+                payload = json.loads(message.payload)
+            except ValueError:
+                continue
+
+            if message.topic.endswith("/status_request"):
+                self._publish_status()
+                continue
+
+            self.stats["commands"] += 1
+            if not self.bluetooth_connected:
+                self.stats["dropped"] += 1
+                continue
+            asyncio.get_running_loop().call_later(
+                self.random.uniform(*self.latency), self._execute, payload
+            )
+
+    def _execute(self, payload: dict) -> None:
+        """Execute a command on the model and publish the reply."""
+        if not self.bluetooth_connected:
+            self.stats["dropped"] += 1
+            return
+
+        cmd_type = payload.get("cmd_type")
+        code = str(payload.get("param", "")).upper()
+        if cmd_type == "set_param" and code in self.model.params:
+            self.model.params[code] = int(payload.get("value", 0))
+            value = self.model.params[code]
+        elif cmd_type == "get_param" and code in self.model.params:
+            value = self.model.params[code]
+        elif cmd_type == "get_var" and code in self.model.variables():
+            value = self.model.variables()[code]
+        else:
+            return
+
+        self.stats["replies"] += 1
+        self._publish_value(code, value, payload.get("seq") if self.echo_seq else None)
+
+    async def _run_model(self) -> None:
+        """Advance the model and inject Bluetooth drops."""
+        interval = 0.1
+        while True:
+            await asyncio.sleep(interval)
+            # Шаг модели не больше секунды, иначе ускоренное время теряет устойчивость
+            elapsed = interval * self.time_scale
+            while elapsed > 0:
+                self.model.step(min(elapsed, 1.0))
+                elapsed -= 1.0
+
+            if self.bluetooth_connected and self.random.random() < self.drop_rate * interval:
+                self.bluetooth_connected = False
+                self.stats["drops"] += 1
+                self._reconnect_at = time.monotonic() + self.random.uniform(*self.drop_duration)
+                self._publish_status()
+            elif self._reconnect_at is not None and time.monotonic() >= self._reconnect_at:
+                self.reconnect()
+
+    async def _emit_telemetry(self) -> None:
+        """Publish real-time variables at telemetry_rate Hz."""
+        interval = 1 / self.telemetry_rate
+        next_tick = time.monotonic()
+        while True:
+            next_tick += interval
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            if not self.bluetooth_connected:
+                continue
+            for code, value in self.model.variables().items():
+                self._publish_value(code, value)
+                self.stats["telemetry"] += 1
+
+
+class PollingProbe:
+    """Client that polls like the integration and measures reply latency."""
+
+    POLL_COMMANDS = [
+        ("get_param", "0001"), ("get_param", "0002"), ("get_param", "0003"),
+        ("get_param", "0004"), ("get_param", "0007"), ("get_param", "0015"),
+        ("get_param", "001D"), ("get_var", "04"), ("get_var", "09"), ("get_var", "11"),
+    ]
+
+    def __init__(self, broker: InProcessBroker, topic_prefix: str, polling_interval: float) -> None:
+        """Initialize the probe."""
+        self.broker = broker
+        self.topic_prefix = topic_prefix
+        self.polling_interval = polling_interval
+        self.sent = 0
+        self.received = 0
+        self.max_gap = 0.0
+        self.latencies = []
+        self._outstanding = {}
+        self._last_message = None
+
+    async def run(self) -> None:
+        """Poll and collect replies until cancelled."""
+        client = self.broker.client()
+        await client.subscribe(f"{self.topic_prefix}/data")
+        receiver = asyncio.create_task(self._receive(client))
+        try:
+            while True:
+                for cmd_type, param in self.POLL_COMMANDS:
+                    if cmd_type == "get_param":
+                        self._outstanding.setdefault(param, []).append(time.monotonic())
+                    await client.publish(f"{self.topic_prefix}/control", json.dumps(
+                        {"cmd_type": cmd_type, "param": param, "value": 0}
+                    ))
+                    self.sent += 1
+                await asyncio.sleep(self.polling_interval)
+        finally:
+            receiver.cancel()
+
+    async def _receive(self, client: InProcessClient) -> None:
+        """Match replies to outstanding polls."""
+        async for message in client.messages:
+            now = time.monotonic()
+            if self._last_message is not None:
+                self.max_gap = max(self.max_gap, now - self._last_message)
+            self._last_message = now
+
+            data = json.loads(message.payload)
+            code = data.get("name", {}).get("code", "").replace("0x", "")
+            # Переменные приходят и в телеметрии, поэтому задержку меряем по параметрам
+            outstanding = self._outstanding.get(code) if len(code) == 4 else None
+            if outstanding:
+                self.received += 1
+                self.latencies.append(now - outstanding.pop(0))
+
+    def summary(self) -> dict:
+        """Return collected statistics."""
+        latencies = sorted(self.latencies)
+        return {
+            "polls_sent": self.sent,
+            "param_replies": self.received,
+            "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+            "latency_max": latencies[-1] if latencies else None,
+            "max_message_gap": self.max_gap,
+        }
+
+
+async def soak(args: argparse.Namespace) -> dict:
+    """Run the simulator with a polling probe for the given duration."""
+    broker = InProcessBroker()
+    simulator = BridgeSimulator(
+        broker,
+        topic_prefix=args.topic_prefix,
+        telemetry_rate=args.rate,
+        latency=(args.latency_min, args.latency_max),
+        drop_rate=args.drop_rate,
+        time_scale=args.time_scale,
+        echo_seq=args.echo_seq,
+        seed=args.seed,
+    )
+    simulator.model.params.update({"001D": args.mode, "0007": 1})
+    await simulator.start()
+
+    probe = PollingProbe(broker, args.topic_prefix, args.polling_interval)
+    probe_task = asyncio.create_task(probe.run())
+    try:
+        await asyncio.sleep(args.duration)
+    finally:
+        probe_task.cancel()
+        await asyncio.gather(probe_task, return_exceptions=True)
+        await simulator.stop()
+
+    return {
+        **simulator.stats,
+        **probe.summary(),
+        "temperature": round(simulator.model.temperature, 1),
+        "flame_level": simulator.model.flame_level,
+    }
+
+
+def _import_integration():
+    """Import the integration package this file belongs to."""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(package_dir))
+    return importlib.import_module(os.path.basename(package_dir))
+
+
+async def integration_soak(args: argparse.Namespace) -> dict:
+    """Run the integration's ingest, watchdog, polling and writes against the simulator."""
+    from homeassistant.core import HomeAssistant  # noqa: PLC0415
+
+    integration = _import_integration()
+    transport_module = importlib.import_module(f"{integration.__name__}.transport")
+    domain = integration.DOMAIN
+
+    broker = InProcessBroker()
+    simulator = BridgeSimulator(
+        broker,
+        topic_prefix=args.topic_prefix,
+        telemetry_rate=args.rate,
+        latency=(args.latency_min, args.latency_max),
+        drop_rate=args.drop_rate,
+        time_scale=args.time_scale,
+        echo_seq=args.echo_seq,
+        seed=args.seed,
+    )
+    simulator.model.params.update({"001D": args.mode, "0007": 1})
+    await simulator.start()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        conf = integration.CONFIG_SCHEMA({domain: {
+            "host": "127.0.0.1",
+            "polling_interval": max(1, int(args.polling_interval)),
+            "mqtt_topic_prefix": args.topic_prefix,
+            # Мост-симулятор восстанавливает Bluetooth сам, HTTP /reconnect у него нет
+            "auto_reconnect": False,
+        }})[domain]
+        transport = transport_module.DirectMqttTransport(hass, 0, broker.client)
+        hass.data[domain] = integration.create_runtime_data(hass, conf, transport)
+        config = hass.data[domain]
+
+        await integration.setup_services(hass)
+        await integration.setup_mqtt(hass)
+        await integration.start_bluetooth_monitoring(hass)
+        polling = asyncio.create_task(integration.start_polling(hass))
+
+        stats = {"writes_ok": 0, "writes_failed": 0, "outages_detected": 0}
+        thermostat = simulator.model.params["0004"]
+        was_connected = True
+        deadline = time.monotonic() + args.duration
+        next_write = time.monotonic() + args.write_interval
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(1)
+                if was_connected and not config["bluetooth_connected"] and config["connected"]:
+                    stats["outages_detected"] += 1
+                was_connected = config["bluetooth_connected"]
+
+                if args.write_interval > 0 and time.monotonic() >= next_write:
+                    next_write = time.monotonic() + args.write_interval
+                    thermostat = 65 if thermostat != 65 else 75
+                    ok = await integration.async_write_param(hass, "0004", thermostat)
+                    stats["writes_ok" if ok else "writes_failed"] += 1
+        finally:
+            polling.cancel()
+            await asyncio.gather(polling, return_exceptions=True)
+            await transport.async_stop()
+            await simulator.stop()
+            await hass.async_stop(force=True)
+
+    # Кэш параметров должен совпасть с моделью после последнего опроса
+    mismatched = [
+        name for code, name in integration.PARAM_MAPPING.items()
+        if code in simulator.model.params and config["data"].get(name) != simulator.model.params[code]
+    ]
+    return {
+        **simulator.stats,
+        **stats,
+        "stale_replies_dropped": config["sequencer"].dropped,
+        "pending_writes_left": len(config["pending_writes"]),
+        "effective_bluetooth_timeout": config["effective_bluetooth_timeout"],
+        "mismatched_params": mismatched,
+        "temperature": round(simulator.model.temperature, 1),
+    }
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run")
+    parser.add_argument("--rate", type=float, default=0.1, help="telemetry rate, Hz")
+    parser.add_argument("--polling-interval", type=float, default=10)
+    parser.add_argument("--latency-min", type=float, default=0.05)
+    parser.add_argument("--latency-max", type=float, default=0.3)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Bluetooth drops per second")
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--mode", type=int, choices=[0, 1, 2], default=1)
+    parser.add_argument("--topic-prefix", default=DEFAULT_TOPIC_PREFIX)
+    parser.add_argument("--echo-seq", action="store_true", help="echo command seq in replies")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--integration", action="store_true",
+                        help="soak the integration's code instead of the polling probe")
+    parser.add_argument("--write-interval", type=float, default=30,
+                        help="seconds between thermostat writes with --integration (0 = none)")
+    args = parser.parse_args()
+
+    run = integration_soak if args.integration else soak
+    print(json.dumps(asyncio.run(run(args)), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
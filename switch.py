@@ -5,6 +5,10 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import ToggleEntity
 
+from .profiler import profiled
+from .registry import BY_NAME, specs_for_entity
+from .tracing import trace_mark, trace_start, trace_state_unchanged, trace_state_written
+
 DOMAIN = "kotel_mqtt"
 
 _LOGGER = logging.getLogger(__name__)
@@ -14,7 +18,8 @@ async def async_setup_platform(hass: HomeAssistant, config, async_add_entities,
     _LOGGER.info("Setting up Kotel MQTT switches")
 
     switches = [
-        KotelSwitch(hass, 'ignition', 'Розжиг котла', 'mdi:fire'),
+        KotelSwitch(hass, spec.name, spec.label, spec.icon)
+        for spec in specs_for_entity('switch')
     ]
 
     async_add_entities(switches, True)
@@ -30,11 +35,7 @@ class KotelSwitch(ToggleEntity):
         self._icon = icon
         self._unique_id = f"kotel_mqtt_{switch_type}_switch"
         self._is_on = False
-
-        # Map switch type to parameter code
-        self._param_mapping = {
-            'ignition': '0007'
-        }
+        self._param_code = BY_NAME[switch_type].code
 
     async def async_added_to_hass(self):
         """Register callbacks."""
@@ -47,15 +48,20 @@ class KotelSwitch(ToggleEntity):
         self._handle_update()
 
     @callback
+    @profiled
     def _handle_update(self, param_name=None):
         """Handle update from dispatcher."""
         if param_name is None or param_name == self._switch_type:
             if DOMAIN in self.hass.data:
+                trace_mark(self.hass, self._switch_type, "dispatch")
                 data = self.hass.data[DOMAIN]['data']
                 new_state = data.get(self._switch_type, 0) == 1
                 if new_state != self._is_on:
                     self._is_on = new_state
                     self.async_write_ha_state()
+                    trace_state_written(self.hass, self._switch_type)
+                else:
+                    trace_state_unchanged(self.hass, self._switch_type)
 
     @property
     def unique_id(self):
@@ -68,6 +74,7 @@ class KotelSwitch(ToggleEntity):
         return self._name
 
     @property
+    @profiled
     def is_on(self):
         """Return true if switch is on."""
         return self._is_on
@@ -75,22 +82,20 @@ class KotelSwitch(ToggleEntity):
     async def async_turn_on(self, **kwargs):
         """Turn the switch on."""
         _LOGGER.info("Turning on %s", self._switch_type)
-        param_code = self._param_mapping.get(self._switch_type)
-        if param_code:
-            await self.hass.services.async_call(
-                DOMAIN, 'send_command',
-                {'cmd_type': 'set_param', 'param': param_code, 'value': 1}
-            )
+        trace_start(self.hass, self._switch_type, "entity")
+        await self.hass.services.async_call(
+            DOMAIN, 'send_command',
+            {'cmd_type': 'set_param', 'param': self._param_code, 'value': 1}
+        )
 
     async def async_turn_off(self, **kwargs):
         """Turn the switch off."""
         _LOGGER.info("Turning off %s", self._switch_type)
-        param_code = self._param_mapping.get(self._switch_type)
-        if param_code:
-            await self.hass.services.async_call(
-                DOMAIN, 'send_command',
-                {'cmd_type': 'set_param', 'param': param_code, 'value': 0}
-            )
+        trace_start(self.hass, self._switch_type, "entity")
+        await self.hass.services.async_call(
+            DOMAIN, 'send_command',
+            {'cmd_type': 'set_param', 'param': self._param_code, 'value': 0}
+        )
 
     @property
     def icon(self):
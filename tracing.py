@@ -0,0 +1,203 @@
+"""Per-command tracing for Kotel MQTT in the Chrome trace event format.
+
+A trace follows one parameter change from the entity method through the
+service call, MQTT publish, bridge reply and dispatcher to the entity state
+write. Each stage lasts until the next one starts. Completed traces are
+appended to a rotating JSON file that opens in Perfetto or chrome://tracing.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from homeassistant.core import HomeAssistant
+
+DOMAIN = "kotel_mqtt"
+
+_LOGGER = logging.getLogger(__name__)
+
+TRACE_FILE = "kotel_mqtt_trace.json"
+TRACE_TIMEOUT = 60  # seconds; незавершённая трасса записывается как есть
+# Решение о выборке принимается один раз на команду: следующие этапы той же команды
+# (сущность -> сервис) приходят в пределах этого окна и повторно не разыгрываются
+SAMPLING_DECISION_WINDOW = 1  # seconds
+FLUSH_INTERVAL = 10  # seconds
+
+
+class CommandTracer:
+    """Sampled command traces keyed by parameter name."""
+
+    def __init__(self, path: str, sample_rate: float, max_bytes: int, backup_count: int) -> None:
+        """Initialize the tracer."""
+        self._path = path
+        self._sample_rate = sample_rate
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._lock = threading.Lock()
+        self._active = {}
+        self._not_sampled = {}  # имя -> время отказа в выборке, мкс
+        self._events = []
+        self._next_id = 1
+
+    def start(self, name: str, stage: str) -> None:
+        """Start a sampled trace for a parameter or continue the running one."""
+        now = time.monotonic_ns() // 1000
+        with self._lock:
+            trace = self._active.get(name)
+            if trace is not None and now - trace["stages"][0][1] < TRACE_TIMEOUT * 1_000_000:
+                # Трасса уже начата выше по цепочке (например, в сущности)
+                trace["stages"].append((stage, now))
+                return
+            if trace is not None:
+                self._finish(name, complete=False)
+
+            skipped = self._not_sampled.pop(name, None)
+            if skipped is not None and now - skipped < SAMPLING_DECISION_WINDOW * 1_000_000:
+                # Команда уже не попала в выборку на предыдущем этапе
+                self._not_sampled[name] = skipped
+                return
+            if random.random() >= self._sample_rate:
+                self._not_sampled[name] = now
+                return
+
+            self._active[name] = {"id": self._next_id, "stages": [(stage, now)], "replied": False}
+            self._next_id += 1
+
+    def mark(self, name: str, stage: str) -> None:
+        """Record the start of a stage of a running trace."""
+        if name not in self._active:
+            return
+        with self._lock:
+            trace = self._active.get(name)
+            if trace is None:
+                return
+            trace["stages"].append((stage, time.monotonic_ns() // 1000))
+            if stage == "reply":
+                trace["replied"] = True
+
+    def state_written(self, name: str) -> None:
+        """Record an entity state write; closes the trace once the reply reached the entity."""
+        if name not in self._active:
+            return
+        with self._lock:
+            trace = self._active.get(name)
+            if trace is None:
+                return
+            # До ответа котла это оптимистичная запись, после - запись подтверждённого значения
+            stage = "write_state" if trace["replied"] else "write_state (optimistic)"
+            trace["stages"].append((stage, time.monotonic_ns() // 1000))
+            if trace["replied"]:
+                self._finish(name, complete=True)
+
+    def state_unchanged(self, name: str) -> None:
+        """Close a replied trace whose reply matched the state already written."""
+        if name not in self._active:
+            return
+        with self._lock:
+            trace = self._active.get(name)
+            if trace is None or not trace["replied"]:
+                return
+            trace["stages"].append(("state unchanged", time.monotonic_ns() // 1000))
+            self._finish(name, complete=True)
+
+    def _finish(self, name: str, complete: bool) -> None:
+        """Convert a trace into complete ('X') events; caller holds the lock."""
+        trace = self._active.pop(name)
+        stages = trace["stages"]
+        end = stages[-1][1]
+        common = {"pid": 1, "tid": trace["id"], "cat": "kotel_mqtt"}
+
+        self._events.append({
+            **common,
+            "name": f"{name}{'' if complete else ' (incomplete)'}",
+            "ph": "X",
+            "ts": stages[0][1],
+            "dur": end - stages[0][1],
+            "args": {"param": name, "complete": complete},
+        })
+        for (stage, start), (_, stop) in zip(stages, stages[1:]):
+            self._events.append({**common, "name": stage, "ph": "X", "ts": start, "dur": stop - start})
+        self._events.append({**common, "name": stages[-1][0], "ph": "i", "s": "t", "ts": end})
+
+    def take_events(self) -> list:
+        """Close timed-out traces, return buffered events and clear the buffer."""
+        now = time.monotonic_ns() // 1000
+        with self._lock:
+            for name, trace in list(self._active.items()):
+                if now - trace["stages"][0][1] >= TRACE_TIMEOUT * 1_000_000:
+                    self._finish(name, complete=False)
+            events, self._events = self._events, []
+            return events
+
+    def write(self, events: list) -> None:
+        """Append events to the trace file, rotating it by size; runs in the executor."""
+        if os.path.exists(self._path) and os.path.getsize(self._path) >= self._max_bytes:
+            self._rotate()
+
+        # Формат JSON Array допускает отсутствие закрывающей скобки,
+        # поэтому файл можно дописывать построчно
+        new_file = not os.path.exists(self._path)
+        with open(self._path, "a", encoding="utf-8") as trace_file:
+            if new_file:
+                trace_file.write("[\n")
+            for event in events:
+                trace_file.write(json.dumps(event) + ",\n")
+
+    def _rotate(self) -> None:
+        """Shift trace.json -> trace.json.1 -> ... and drop the oldest."""
+        for index in range(self._backup_count - 1, 0, -1):
+            source = f"{self._path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self._path}.{index + 1}")
+        if self._backup_count > 0:
+            os.replace(self._path, f"{self._path}.1")
+        else:
+            os.remove(self._path)
+
+
+def _tracer(hass: HomeAssistant):
+    """Return the tracer if tracing is enabled."""
+    return hass.data.get(DOMAIN, {}).get("tracer")
+
+
+def trace_start(hass: HomeAssistant, name: str, stage: str) -> None:
+    """Start a trace for a parameter; no-op when tracing is disabled."""
+    tracer = _tracer(hass)
+    if tracer is not None:
+        tracer.start(name, stage)
+
+
+def trace_mark(hass: HomeAssistant, name: str, stage: str) -> None:
+    """Record a stage of a running trace; no-op when tracing is disabled."""
+    tracer = _tracer(hass)
+    if tracer is not None:
+        tracer.mark(name, stage)
+
+
+def trace_state_written(hass: HomeAssistant, name: str) -> None:
+    """Record an entity state write; no-op when tracing is disabled."""
+    tracer = _tracer(hass)
+    if tracer is not None:
+        tracer.state_written(name)
+
+
+def trace_state_unchanged(hass: HomeAssistant, name: str) -> None:
+    """Record an update that did not change the state; no-op when tracing is disabled."""
+    tracer = _tracer(hass)
+    if tracer is not None:
+        tracer.state_unchanged(name)
+
+
+async def async_flush_traces(hass: HomeAssistant, *_) -> None:
+    """Write buffered trace events in the executor."""
+    tracer = _tracer(hass)
+    if tracer is None:
+        return
+    events = tracer.take_events()
+    if events:
+        try:
+            await hass.async_add_executor_job(tracer.write, events)
+        except OSError as e:
+            _LOGGER.error("Error writing trace file: %s", e)
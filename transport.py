@@ -0,0 +1,138 @@
+"""MQTT transports for Kotel MQTT: HA's shared client or a dedicated connection."""
+import asyncio
+from collections import namedtuple
+from collections.abc import Callable
+import logging
+
+from homeassistant.components import mqtt
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+MQTT_MODE_SHARED = "shared"
+MQTT_MODE_DIRECT = "direct"
+
+RECONNECT_INTERVAL = 5  # seconds
+
+ReceivedMessage = namedtuple("ReceivedMessage", ["topic", "payload"])
+
+
+class SharedMqttTransport:
+    """Transport over Home Assistant's MQTT integration."""
+
+    def __init__(self, hass: HomeAssistant, qos: int) -> None:
+        """Initialize the transport."""
+        self._hass = hass
+        self._qos = qos
+
+    async def async_start(self) -> None:
+        """Nothing to start: HA owns the connection."""
+
+    async def async_stop(self, *_) -> None:
+        """Nothing to stop: HA owns the connection."""
+
+    async def async_subscribe(self, topic: str, msg_callback: Callable) -> Callable:
+        """Subscribe to a topic and return the unsubscribe callable."""
+        return await mqtt.async_subscribe(self._hass, topic, msg_callback, qos=self._qos)
+
+    async def async_publish(self, topic: str, payload: str) -> None:
+        """Publish a payload."""
+        await mqtt.async_publish(self._hass, topic, payload, qos=self._qos)
+
+
+class DirectMqttTransport:
+    """Dedicated MQTT connection with a persistent session.
+
+    ``client_factory`` returns an async context manager with ``subscribe``,
+    ``publish`` and a ``messages`` async iterator, i.e. the aiomqtt client
+    API, so an in-process broker stand-in can be used instead of aiomqtt.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        qos: int,
+        client_factory: Callable,
+    ) -> None:
+        """Initialize the transport."""
+        self._hass = hass
+        self._qos = qos
+        self._client_factory = client_factory
+        self._client = None
+        self._callbacks = {}
+        self._task = None
+
+    async def async_start(self) -> None:
+        """Start the connection loop."""
+        self._task = self._hass.async_create_background_task(
+            self._run(), f"{__name__} connection"
+        )
+
+    async def async_stop(self, *_) -> None:
+        """Stop the connection loop."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._client = None
+
+    async def async_subscribe(self, topic: str, msg_callback: Callable) -> Callable:
+        """Subscribe to a topic and return the unsubscribe callable."""
+        self._callbacks[topic] = msg_callback
+        if self._client is not None:
+            await self._client.subscribe(topic, qos=self._qos)
+
+        def unsubscribe():
+            self._callbacks.pop(topic, None)
+
+        return unsubscribe
+
+    async def async_publish(self, topic: str, payload: str) -> None:
+        """Publish a payload."""
+        if self._client is None:
+            raise ConnectionError("Dedicated MQTT client is not connected")
+        await self._client.publish(topic, payload, qos=self._qos)
+
+    async def _run(self) -> None:
+        """Keep the connection alive and hand received messages to subscribers."""
+        while True:
+            try:
+                async with self._client_factory() as client:
+                    for topic in self._callbacks:
+                        await client.subscribe(topic, qos=self._qos)
+                    self._client = client
+                    _LOGGER.info("Dedicated MQTT client connected")
+
+                    async for message in client.messages:
+                        topic = str(message.topic)
+                        msg_callback = self._callbacks.get(topic)
+                        if msg_callback is not None:
+                            msg_callback(ReceivedMessage(topic, message.payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # noqa: BLE001
+                _LOGGER.warning("Dedicated MQTT connection lost: %s", e)
+            finally:
+                self._client = None
+
+            await asyncio.sleep(RECONNECT_INTERVAL)
+
+
+def aiomqtt_client_factory(host, port, username, password, client_id) -> Callable:
+    """Return a factory of persistent-session aiomqtt clients.
+
+    aiomqtt is only needed for the direct mode, so it is imported here and
+    raises ImportError if the package is not installed.
+    """
+    import aiomqtt  # noqa: PLC0415
+
+    def factory():
+        return aiomqtt.Client(
+            hostname=host,
+            port=port,
+            username=username,
+            password=password,
+            identifier=client_id,
+            clean_session=False,
+        )
+
+    return factory
@@ -0,0 +1,172 @@
+"""Websocket telemetry stream for Kotel MQTT."""
+from collections import deque
+import logging
+import time
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+DOMAIN = "kotel_mqtt"
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_FRAME_INTERVAL = 0.1  # seconds
+MAX_BUFFERED_READINGS = 500  # На подписчика; сверх этого старые показания отбрасываются
+# Если в очереди соединения больше неотправленных сообщений, клиент считается отстающим.
+# Порог намного ниже MAX_PENDING_MSG, при котором HA разрывает соединение
+MAX_PENDING_MESSAGES = 64
+# Если очередь соединения недоступна, кадры отправляются не чаще этого интервала:
+# так подписка сама ограничивает свою долю в очереди, не зная скорости клиента
+FALLBACK_FRAME_INTERVAL = 1.0  # seconds
+
+_backlog_unavailable_logged = False
+
+
+def pending_messages(connection) -> int | None:
+    """Return the number of messages queued for the client but not yet written.
+
+    The websocket handler does not expose its queue, so this reads the
+    private deque behind send_message. Returns None if it is not there.
+    """
+    global _backlog_unavailable_logged  # noqa: PLW0603
+    handler = getattr(connection.send_message, "__self__", None)
+    queue = getattr(handler, "_message_queue", None)
+    if queue is None:
+        if not _backlog_unavailable_logged:
+            _LOGGER.debug("Websocket message queue not accessible, limiting telemetry to one frame per %s s",
+                          FALLBACK_FRAME_INTERVAL)
+            _backlog_unavailable_logged = True
+        return None
+    return len(queue)
+
+
+class TelemetrySubscription:
+    """Per-connection buffer flushed to the client once per frame."""
+
+    def __init__(self, hass: HomeAssistant, hub, connection, msg_id, names, frame_interval) -> None:
+        """Initialize the subscription."""
+        self._hass = hass
+        self._hub = hub
+        self._connection = connection
+        self._msg_id = msg_id
+        self._names = set(names) if names else None
+        self._frame_interval = frame_interval
+        self._buffer = deque(maxlen=MAX_BUFFERED_READINGS)
+        self._dropped = 0
+        self._flush_handle = None
+        self._last_frame = None
+
+    @callback
+    def add(self, reading: tuple) -> None:
+        """Buffer a reading and schedule the next frame."""
+        if self._names is not None and reading[1] not in self._names:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self._dropped += 1
+        self._buffer.append(reading)
+        if self._flush_handle is None:
+            self._flush_handle = self._hass.loop.call_later(self._frame_interval, self._flush)
+
+    @callback
+    def _flush(self) -> None:
+        """Send buffered readings as one frame, or coalesce them while the client is behind."""
+        self._flush_handle = None
+        if not self._buffer:
+            return
+
+        backlog = pending_messages(self._connection)
+        if backlog is None:
+            now = time.monotonic()
+            behind = self._last_frame is not None and now - self._last_frame < FALLBACK_FRAME_INTERVAL
+        else:
+            behind = backlog > MAX_PENDING_MESSAGES
+
+        if behind:
+            # Клиент не успевает: оставляем только последнее показание каждой величины
+            latest = {name: (timestamp, name, value) for timestamp, name, value in self._buffer}
+            self._dropped += len(self._buffer) - len(latest)
+            self._buffer.clear()
+            self._buffer.extend(latest.values())
+            self._flush_handle = self._hass.loop.call_later(self._frame_interval, self._flush)
+            return
+
+        readings = [
+            {"t": timestamp, "name": name, "value": value}
+            for timestamp, name, value in self._buffer
+        ]
+        self._buffer.clear()
+        self._last_frame = time.monotonic()
+        self._connection.send_message(
+            websocket_api.event_message(
+                self._msg_id, {"readings": readings, "dropped": self._dropped}
+            )
+        )
+        self._dropped = 0
+
+    @callback
+    def unsubscribe(self) -> None:
+        """Stop the stream."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._hub.remove(self)
+
+
+class TelemetryHub:
+    """Fan-out of decoded readings from the ingest path to websocket clients."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the hub."""
+        self._hass = hass
+        self._subscriptions = set()
+
+    def publish(self, name: str, value) -> None:
+        """Offer a reading; a no-op without subscribers. Safe from any thread."""
+        if not self._subscriptions:
+            return
+        self._hass.loop.call_soon_threadsafe(self._dispatch, (time.time(), name, value))
+
+    @callback
+    def _dispatch(self, reading: tuple) -> None:
+        """Hand a reading to every subscription."""
+        for subscription in list(self._subscriptions):
+            subscription.add(reading)
+
+    @callback
+    def add(self, subscription: TelemetrySubscription) -> None:
+        """Register a subscription."""
+        self._subscriptions.add(subscription)
+
+    @callback
+    def remove(self, subscription: TelemetrySubscription) -> None:
+        """Unregister a subscription."""
+        self._subscriptions.discard(subscription)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "kotel_mqtt/subscribe_telemetry",
+        vol.Optional("names"): [str],
+        vol.Optional("frame_interval", default=DEFAULT_FRAME_INTERVAL): vol.All(
+            vol.Coerce(float), vol.Range(min=0.02, max=5)
+        ),
+    }
+)
+@callback
+def ws_subscribe_telemetry(hass: HomeAssistant, connection, msg) -> None:
+    """Stream decoded readings to the client, bypassing the state machine."""
+    hub = hass.data[DOMAIN]["telemetry"]
+    subscription = TelemetrySubscription(
+        hass, hub, connection, msg["id"], msg.get("names"), msg["frame_interval"]
+    )
+    hub.add(subscription)
+    connection.subscriptions[msg["id"]] = subscription.unsubscribe
+    connection.send_result(msg["id"])
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register websocket commands."""
+    websocket_api.async_register_command(hass, ws_subscribe_telemetry)